@@ -27,8 +27,22 @@ type Alert struct {
 	HTMLBody string   `json:"htmlbody"`
 }
 
+// routeSet is a set of all route_ids from the GTFS
+type routeSet map[string]struct{}
+
+// newRouteSet collects route_ids of all types from a route_type → route_ids map
+func newRouteSet(routeMap map[string]sort.StringSlice) routeSet {
+	s := make(routeSet)
+	for _, routeSubList := range routeMap {
+		for _, route := range routeSubList {
+			s[route] = struct{}{}
+		}
+	}
+	return s
+}
+
 // alertFromRssItem extracts basic data from an RssItem and puts them into an Alert
-func alertFromRssItem(r *rssItem, routeMap map[string]sort.StringSlice) (a *Alert, err error) {
+func alertFromRssItem(r *rssItem, routes routeSet) (a *Alert, err error) {
 	a = &Alert{}
 
 	// Extract the ID
@@ -53,18 +67,10 @@ func alertFromRssItem(r *rssItem, routeMap map[string]sort.StringSlice) (a *Aler
 	a.Title = htmlCleaner.Sanitize(r.Description)
 
 	// Extract affected routes from the title
-	if strings.Contains(r.Title, ":") {
-		routesString := strings.SplitN(r.Title, ":", 2)[1]
-
+	if _, routesString, hasRoutes := strings.Cut(r.Title, ":"); hasRoutes {
 		for _, route := range regexRoute.FindAllString(routesString, -1) {
-			validRoute := false
-
 			// Check if the route is mentioned in the GTFS
-			for _, routeSubList := range routeMap {
-				validRoute = validRoute || util.StringSliceHas(routeSubList, route)
-			}
-
-			if validRoute {
+			if _, validRoute := routes[route]; validRoute {
 				a.Routes = append(a.Routes, route)
 			}
 		}
@@ -223,13 +229,10 @@ func (ac *AlertContainer) SaveJSON(target string) (err error) {
 	}
 	defer f.Close()
 
-	// Marshall JSON
-	b, err := json.MarshalIndent(ac, "", "  ")
-	if err != nil {
-		return
-	}
-	f.Write(b)
-
+	// Marshall JSON straight into the file
+	enc := json.NewEncoder(f)
+	enc.SetIndent("", "  ")
+	err = enc.Encode(ac)
 	return
 }
 
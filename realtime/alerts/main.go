@@ -7,7 +7,6 @@ import (
 	"log"
 	"net/http"
 	"sort"
-	"sync"
 	"time"
 
 	"github.com/MKuranowski/WarsawGTFS/realtime/gtfs"
@@ -23,30 +22,46 @@ type Options struct {
 	ThrowLinkErrors bool
 }
 
-// exclusiveHttpClient is a pair of *html.Client and *sync.Mutex
+// maxConcurrentRequests is the maximum number of requests made to wtp.waw.pl at once
+const maxConcurrentRequests = 4
+
+// exclusiveHttpClient is a pair of *html.Client and a semaphore
 // to avoid spamming a single host with requests
 type exclusiveHTTPClient struct {
-	m *sync.Mutex
-	c *http.Client
+	sem chan struct{}
+	c   *http.Client
+}
+
+// newExclusiveHTTPClient wraps a http.Client so that at most maxConcurrent
+// requests are made simultaneously
+func newExclusiveHTTPClient(c *http.Client, maxConcurrent int) exclusiveHTTPClient {
+	return exclusiveHTTPClient{sem: make(chan struct{}, maxConcurrent), c: c}
 }
 
 func (client exclusiveHTTPClient) Get(url string) (resp *http.Response, err error) {
-	client.m.Lock()
-	defer client.m.Unlock()
+	client.sem <- struct{}{}
+	defer func() { <-client.sem }()
 	return client.c.Get(url)
 }
 
 // allRssItems fetches urlImpediments and urlChanges and retrieves all
 // RssItems that should be converted into Alerts
 func allRssItems(client exclusiveHTTPClient) (items []*rssItem, err error) {
-	// Load both RSS feeds
+	// Load both RSS feeds concurrently
+	var changesRss *rssRoot
+	var changesErr error
+	changesDone := make(chan struct{})
+	go func() {
+		defer close(changesDone)
+		changesRss, changesErr = getRss(client, urlChanges, "OTHER_EFFECT")
+	}()
+
 	impedimentsRss, err := getRss(client, urlImpediments, "REDUCED_SERVICE")
+	<-changesDone
 	if err != nil {
 		return
-	}
-
-	changesRss, err := getRss(client, urlChanges, "OTHER_EFFECT")
-	if err != nil {
+	} else if changesErr != nil {
+		err = changesErr
 		return
 	}
 
@@ -66,10 +81,7 @@ func Make(client *http.Client, routeMap map[string]sort.StringSlice, opts Option
 	container.Time = container.Timestamp.Format(time.RFC3339)
 
 	// Wrap the http.Client into exclusiveHTTPClient to avoid spamming wtp.waw.pl
-	exclusiveClient := exclusiveHTTPClient{
-		m: &sync.Mutex{},
-		c: client,
-	}
+	exclusiveClient := newExclusiveHTTPClient(client, maxConcurrentRequests)
 
 	// Load both RSS feeds
 	log.Println("Fetching RSS feeds")
@@ -80,9 +92,10 @@ func Make(client *http.Client, routeMap map[string]sort.StringSlice, opts Option
 
 	// Convert RSS items to Alert objects
 	log.Println("Casting RSS items to Alert objects")
+	routes := newRouteSet(routeMap)
 	for _, item := range items {
 		var a *Alert
-		a, err = alertFromRssItem(item, routeMap)
+		a, err = alertFromRssItem(item, routes)
 		if err != nil {
 			return
 		}
@@ -8,6 +8,7 @@ import (
 	"net/url"
 	"regexp"
 	"strings"
+	"sync"
 
 	"github.com/MKuranowski/WarsawGTFS/realtime/util"
 )
@@ -27,12 +28,15 @@ func (e invalidTTableAPIResp) Error() string {
 	return e.text
 }
 
-// ttableAPI is an object for communcating with the timetable api at api.um.warszawa.pl
+// ttableAPI is an object for communcating with the timetable api at api.um.warszawa.pl.
+// It's safe to call Get from multiple goroutines.
 type ttableAPI struct {
 	Key           string
 	Client        *http.Client
 	Respones      map[routeStopPair]mapTimeBrigade // routeStop → time → brigade
 	ForwardErrors bool
+
+	m sync.Mutex // guards Respones
 }
 
 // BuildURL returns the URL to retrieve timetables of a specific route-stop pair
@@ -57,7 +61,9 @@ func (api *ttableAPI) BuildURL(rs routeStopPair) string {
 // Get returns the time→brigade map for a particular route-stop pair
 func (api *ttableAPI) Get(rs routeStopPair) (mapTimeBrigade, bool, error) {
 	// Check if this pair was defined earlier
+	api.m.Lock()
 	ttb, hasCached := api.Respones[rs]
+	api.m.Unlock()
 	if hasCached {
 		return ttb, true, nil
 	}
@@ -99,6 +105,8 @@ func (api *ttableAPI) Get(rs routeStopPair) (mapTimeBrigade, bool, error) {
 
 	// Parse the response
 	ttb, err = parseBrigadesResponse(rawData, rs, api.ForwardErrors)
+	api.m.Lock()
+	defer api.m.Unlock()
 	if err != nil {
 		api.Respones[rs] = make(mapTimeBrigade)
 		return nil, false, err
@@ -108,6 +116,55 @@ func (api *ttableAPI) Get(rs routeStopPair) (mapTimeBrigade, bool, error) {
 	return ttb, false, nil
 }
 
+// Prefetch concurrently calls Get on every provided route-stop pair,
+// with at most `workers` requests in flight at once.
+// Stops handing out pairs on the first error, and returns it.
+func (api *ttableAPI) Prefetch(pairs []routeStopPair, workers int) (err error) {
+	// Make synchronization primitives
+	wg := &sync.WaitGroup{}
+	pairCh := make(chan routeStopPair)
+	done := make(chan struct{})
+	failOnce := &sync.Once{}
+
+	// Start the workers
+	for i := 0; i < workers; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			for rs := range pairCh {
+				// Drain remaining pairs without fetching them after a failure
+				select {
+				case <-done:
+					continue
+				default:
+				}
+
+				if _, _, getErr := api.Get(rs); getErr != nil {
+					failOnce.Do(func() {
+						err = getErr
+						close(done)
+					})
+				}
+			}
+		}()
+	}
+
+	// Distribute the pairs, unless any request has failed
+distribute:
+	for _, rs := range pairs {
+		select {
+		case pairCh <- rs:
+		case <-done:
+			break distribute
+		}
+	}
+	close(pairCh)
+
+	// Wait until all workers have finished
+	wg.Wait()
+	return
+}
+
 // parseBrigadesResponse parses UM Warszawa API response when requesting a timetable for specific
 // route_id, stop_id pair
 func parseBrigadesResponse(rawData []byte, rs routeStopPair, forwardErrors bool) (mtb mapTimeBrigade, err error) {
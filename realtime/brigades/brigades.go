@@ -76,22 +76,30 @@ type stopTimeEvent struct {
 	Time      string
 }
 
-// newStopTimeEvent creates a stopTimeEvent instance from a stop_times.txt row
-func newStopTimeEvent(gtfs *gtfs.Gtfs, row map[string]string) (ste stopTimeEvent, err error) {
-	// Ensure all required columns are defined
-	err = util.MissingColumnCheck(
+// stopTimesColumns holds positions of the stop_times.txt columns required by stopTimeEvent
+type stopTimesColumns struct{ TripID, StopID, StopSequence, DepartureTime int }
+
+// newStopTimesColumns finds the required columns in the stop_times.txt header
+func newStopTimesColumns(header []string) (cols stopTimesColumns, err error) {
+	idx, err := util.ColumnIndices(
 		"stop_times.txt",
 		[]string{"trip_id", "stop_id", "stop_sequence", "departure_time"},
-		row)
+		header)
 	if err != nil {
 		return
 	}
 
+	cols = stopTimesColumns{idx[0], idx[1], idx[2], idx[3]}
+	return
+}
+
+// newStopTimeEvent creates a stopTimeEvent instance from a stop_times.txt row
+func newStopTimeEvent(gtfs *gtfs.Gtfs, cols stopTimesColumns, row []string) (ste stopTimeEvent, err error) {
 	// Extract required columns
-	ste.TripID = row["trip_id"]
-	ste.StopID = row["stop_id"]
-	ste.Time = row["departure_time"]
-	ste.Index, err = strconv.ParseUint(row["stop_sequence"], 10, 64)
+	ste.TripID = row[cols.TripID]
+	ste.StopID = row[cols.StopID]
+	ste.Time = row[cols.DepartureTime]
+	ste.Index, err = strconv.ParseUint(row[cols.StopSequence], 10, 64)
 
 	if err != nil {
 		return
@@ -114,19 +122,88 @@ func newStopTimeEvent(gtfs *gtfs.Gtfs, row map[string]string) (ste stopTimeEvent
 	return
 }
 
+// isMatchable returns true if a stop_time belongs to a bus/tram trip active on gtfs.SyncTime
+func isMatchable(gtfs *gtfs.Gtfs, row stopTimeEvent) bool {
+	isActive := gtfs.Services[row.ServiceID]
+	validRoute := util.StringSliceHas(gtfs.Routes["0"], row.RouteID) || util.StringSliceHas(gtfs.Routes["3"], row.RouteID)
+	return isActive && validRoute
+}
+
+// firstRouteStopPairs returns (route_id, stop_id) pairs of the first stop_time
+// of every matchable trip - Match always asks the API about those.
+func firstRouteStopPairs(gtfs *gtfs.Gtfs, stopTimesReader io.Reader) (pairs []routeStopPair, err error) {
+	seenTrips := make(map[string]struct{})
+	seenPairs := make(map[routeStopPair]struct{})
+
+	// Read stop_times.txt - rows are never kept, so their slice can be reused
+	csvReader := csv.NewReader(stopTimesReader)
+	csvReader.ReuseRecord = true
+	header, err := csvReader.Read()
+
+	if err != nil {
+		return
+	}
+
+	cols, err := newStopTimesColumns(header)
+	if err != nil {
+		return
+	}
+
+	for {
+		// Try to get next row
+		var rowSlice []string
+		rowSlice, err = csvReader.Read()
+
+		if err == io.EOF {
+			err = nil
+			break
+		} else if err != nil {
+			return
+		}
+
+		// Extract the required columns
+		var row stopTimeEvent
+		row, err = newStopTimeEvent(gtfs, cols, rowSlice)
+		if err != nil {
+			return
+		}
+
+		// Only look at the first stop_time of matchable trips
+		if _, seen := seenTrips[row.TripID]; seen || !isMatchable(gtfs, row) {
+			continue
+		}
+		seenTrips[row.TripID] = struct{}{}
+
+		// Remember the route-stop pair
+		rs := routeStopPair{Route: row.RouteID, Stop: row.StopID}
+		if _, seen := seenPairs[rs]; !seen {
+			seenPairs[rs] = struct{}{}
+			pairs = append(pairs, rs)
+		}
+	}
+
+	return
+}
+
 // Match matches trips to brigade ids
 func Match(api *ttableAPI, gtfs *gtfs.Gtfs, stopTimesReader io.Reader) (matches MatchedTripData, err error) {
 	// Prepare the map for holding data
 	matches = make(MatchedTripData)
 
-	// Read stop_times.txt
+	// Read stop_times.txt - rows are never kept, so their slice can be reused
 	csvReader := csv.NewReader(stopTimesReader)
+	csvReader.ReuseRecord = true
 	header, err := csvReader.Read()
 
 	if err != nil {
 		return
 	}
 
+	cols, err := newStopTimesColumns(header)
+	if err != nil {
+		return
+	}
+
 	for {
 		// Try to get next row
 		var rowSlice []string
@@ -139,18 +216,15 @@ func Match(api *ttableAPI, gtfs *gtfs.Gtfs, stopTimesReader io.Reader) (matches
 			return
 		}
 
-		// Convert row to map and assert all required columns are there
+		// Extract the required columns
 		var row stopTimeEvent
-		rowMap := util.ZipStrings(header, rowSlice)
-		row, err = newStopTimeEvent(gtfs, rowMap)
+		row, err = newStopTimeEvent(gtfs, cols, rowSlice)
 		if err != nil {
 			return
 		}
 
 		// Check if this trip is bus/tram and if it's active on gtfs.SyncTime
-		isActive := gtfs.Services[row.ServiceID]
-		validRoute := util.StringSliceHas(gtfs.Routes["0"], row.RouteID) || util.StringSliceHas(gtfs.Routes["3"], row.RouteID)
-		if !isActive || !validRoute {
+		if !isMatchable(gtfs, row) {
 			continue
 		}
 
@@ -189,8 +263,7 @@ func Match(api *ttableAPI, gtfs *gtfs.Gtfs, stopTimesReader io.Reader) (matches
 
 		// Get time→brigade mapping for this route-stop pair
 		var mtb mapTimeBrigade
-		var apiFromCache bool
-		mtb, apiFromCache, err = api.Get(routeStopPair{Route: row.RouteID, Stop: row.StopID})
+		mtb, _, err = api.Get(routeStopPair{Route: row.RouteID, Stop: row.StopID})
 		if err != nil {
 			return
 		}
@@ -199,24 +272,22 @@ func Match(api *ttableAPI, gtfs *gtfs.Gtfs, stopTimesReader io.Reader) (matches
 		brigadeID, ok := mtb[seconds]
 		if !ok {
 			logPrintf(
-				"StopTimeEvent: T %s | R %s | S %s (from api: %t) ❌ NO MATCH FOR %s",
+				"StopTimeEvent: T %s | R %s | S %s ❌ NO MATCH FOR %s",
 				false,
 				row.TripID,
 				row.RouteID,
 				row.StopID,
-				!apiFromCache,
 				row.Time,
 			)
 			continue
 		} else {
 			tripEntry.BrigadeID = brigadeID
 			// logPrintf(
-			// 	"StopTimeEvent: T %s | R %s | S %s (from api: %t) ✔️ match for %s",
+			// 	"StopTimeEvent: T %s | R %s | S %s ✔️ match for %s",
 			// 	true,
 			// 	row.TripID,
 			// 	row.RouteID,
 			// 	row.StopID,
-			// 	!apiFromCache,
 			// 	row.Time,
 			// )
 		}
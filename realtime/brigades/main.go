@@ -1,6 +1,7 @@
 package brigades
 
 import (
+	"archive/zip"
 	"errors"
 	"net/http"
 	"os"
@@ -8,6 +9,9 @@ import (
 	"github.com/MKuranowski/WarsawGTFS/realtime/gtfs"
 )
 
+// prefetchWorkers is the maximum number of concurrent requests to the timetable API
+const prefetchWorkers = 8
+
 // Options represents options for creating brigades.json
 type Options struct {
 	JSONTarget     string
@@ -25,11 +29,20 @@ func Main(client *http.Client, gtfs *gtfs.Gtfs, opts Options) error {
 		ForwardErrors: opts.ThrowAPIErrors,
 	}
 
-	// Try to open stop_times.txt
+	// Try to find stop_times.txt
 	file := gtfs.GetZipFileByName("stop_times.txt")
 	if file == nil {
 		return errors.New("gtfs file is missing stop_times.txt`1")
 	}
+
+	// Concurrently fetch timetables for the first stop of every trip,
+	// which is where the vast majority of trips gets matched
+	err := prefetchTimetables(api, gtfs, file)
+	if err != nil {
+		return err
+	}
+
+	// Open stop_times.txt
 	reader, err := file.Open()
 	if err != nil {
 		return err
@@ -62,3 +75,22 @@ func Main(client *http.Client, gtfs *gtfs.Gtfs, opts Options) error {
 	_, err = f.Write(dataJSON)
 	return err
 }
+
+// prefetchTimetables reads stop_times.txt and concurrently retrieves timetables
+// of the first stop of every matchable trip
+func prefetchTimetables(api *ttableAPI, gtfs *gtfs.Gtfs, stopTimes *zip.File) error {
+	reader, err := stopTimes.Open()
+	if err != nil {
+		return err
+	}
+	defer reader.Close()
+
+	logPrint("Collecting first stops of trips", false)
+	pairs, err := firstRouteStopPairs(gtfs, reader)
+	if err != nil {
+		return err
+	}
+
+	logPrintf("Fetching %d timetables", false, len(pairs))
+	return api.Prefetch(pairs, prefetchWorkers)
+}
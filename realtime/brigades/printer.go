@@ -2,11 +2,18 @@ package brigades
 
 import (
 	"log"
+	"sync"
 )
 
 var lastPrintOverwritable bool = false
 
+// printMutex guards lastPrintOverwritable and the log prefix,
+// as timetables are fetched from multiple goroutines
+var printMutex sync.Mutex
+
 func logPrint(s string, overwritable bool) {
+	printMutex.Lock()
+	defer printMutex.Unlock()
 	if lastPrintOverwritable {
 		log.SetPrefix("\033[1A\033[K")
 	}
@@ -16,6 +23,8 @@ func logPrint(s string, overwritable bool) {
 }
 
 func logPrintf(format string, overwritable bool, v ...interface{}) {
+	printMutex.Lock()
+	defer printMutex.Unlock()
 	if lastPrintOverwritable {
 		log.SetPrefix("\033[1A\033[K")
 	}
@@ -25,8 +25,11 @@ func haversine(lat1, lon1, lat2, lon2 float64) float64 {
 	dLatHalf := (lat2 - lat1) / 2
 	dLonHalf := (lon2 - lon1) / 2
 
-	a := math.Pow(math.Sin(dLatHalf), 2)
-	b := math.Pow(math.Sin(dLonHalf), 2)
+	sinDLatHalf := math.Sin(dLatHalf)
+	sinDLonHalf := math.Sin(dLonHalf)
+
+	a := sinDLatHalf * sinDLatHalf
+	b := sinDLonHalf * sinDLonHalf
 	c := math.Sqrt(a + (b * math.Cos(lat1) * math.Cos(lat2)))
 
 	return 2 * 6371 * math.Asin(c)
@@ -41,9 +44,13 @@ func initialBearing(lat1, lon1, lat2, lon2 float64) float64 {
 	dLon := radians(lon2 - lon1)
 
 	// Calculate atan2 arguments
-	x := math.Sin(dLon) * math.Cos(lat2)
-	y1 := math.Cos(lat1) * math.Sin(lat2)
-	y2 := math.Sin(lat1) * math.Cos(lat2) * math.Cos(dLon)
+	sinLat1, cosLat1 := math.Sincos(lat1)
+	sinLat2, cosLat2 := math.Sincos(lat2)
+	sinDLon, cosDLon := math.Sincos(dLon)
+
+	x := sinDLon * cosLat2
+	y1 := cosLat1 * sinLat2
+	y2 := sinLat1 * cosLat2 * cosDLon
 	y := y1 - y2
 
 	// Calculate the initial bearing, then return it in degrees
@@ -1,8 +1,11 @@
 package positions
 
 import (
-	"fmt"
+	"strconv"
+	"strings"
 	"time"
+
+	"github.com/MKuranowski/WarsawGTFS/realtime/util"
 )
 
 type invalidCompareTimeComparison struct {
@@ -23,7 +26,21 @@ type compareTime struct {
 // newcompareTimeFromGtfs creates a certain compareTime object from a "HH:MM:SS" GTFS timepoint
 func newCompareTimeFromGtfs(hms string) (t compareTime, e error) {
 	t.uncertainDay = false
-	_, e = fmt.Sscanf(hms, "%d:%d:%d", &t.h, &t.m, &t.s)
+
+	hStr, rest, ok1 := strings.Cut(hms, ":")
+	mStr, sStr, ok2 := strings.Cut(rest, ":")
+	if !ok1 || !ok2 {
+		e = util.InvalidTimeString{Input: hms}
+		return
+	}
+
+	if t.h, e = strconv.Atoi(hStr); e != nil {
+		return
+	}
+	if t.m, e = strconv.Atoi(mStr); e != nil {
+		return
+	}
+	t.s, e = strconv.Atoi(sStr)
 	return
 }
 
@@ -3,6 +3,7 @@ package positions
 import (
 	"encoding/json"
 	"os"
+	"sync"
 	"time"
 
 	"github.com/MKuranowski/WarsawGTFS/realtime/util"
@@ -11,6 +12,12 @@ import (
 	"google.golang.org/protobuf/proto"
 )
 
+// warsawLocation returns the Europe/Warsaw timezone, which is read from disk
+// only once and not on every update in loop mode
+var warsawLocation = sync.OnceValues(func() (*time.Location, error) {
+	return time.LoadLocation("Europe/Warsaw")
+})
+
 // Vehicle is an object for representing a single vehicle position
 type Vehicle struct {
 	// Basic fields
@@ -258,7 +265,7 @@ func (vc *VehicleContainer) SavePB(target string, humanReadable bool) (err error
 // Prepare initializes the vehiclecontainer.Vehicles map with
 // vehicle objects created from a sequence of apiVehicleEntry
 func (vc *VehicleContainer) Prepare(apiEntries []*APIVehicleEntry) error {
-	timezone, err := time.LoadLocation("Europe/Warsaw")
+	timezone, err := warsawLocation()
 	if err != nil {
 		return err
 	}
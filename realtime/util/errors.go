@@ -2,6 +2,7 @@ package util
 
 import (
 	"fmt"
+	"slices"
 	"strings"
 )
 
@@ -85,6 +86,30 @@ func MissingColumnCheck(file string, required []string, row map[string]string) e
 	return nil
 }
 
+// ColumnIndices returns positions of the required columns in a CSV header,
+// or a MissingColumn error if any of them is not present
+func ColumnIndices(file string, required []string, header []string) (indices []int, err error) {
+	mce := MissingColumn{}
+	indices = make([]int, len(required))
+
+	// Find every required column
+	for i, requiredCol := range required {
+		indices[i] = slices.Index(header, requiredCol)
+		if indices[i] < 0 {
+			mce.Missing = append(mce.Missing, requiredCol)
+		}
+	}
+
+	// If any columns were missing, return a mce-error
+	if len(mce.Missing) > 0 {
+		mce.File = file
+		mce.Required = required
+		return nil, mce
+	}
+
+	return
+}
+
 // InvalidTimeString is an error returned by [util.ParseTime] on invalid input strings
 type InvalidTimeString struct {
 	Input string
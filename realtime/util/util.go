@@ -70,24 +70,25 @@ func ZipStrings(a []string, b []string) (zipped map[string]string) {
 // ParseTimeToSeconds parses a HH:MM[:SS] string into a single number representing a
 // total number of seconds.
 func ParseTimeToSeconds(x string) (uint32, error) {
-	parts := strings.Split(x, ":")
-	if len(parts) < 2 || len(parts) > 3 {
+	hStr, rest, ok := strings.Cut(x, ":")
+	if !ok {
 		return 0, InvalidTimeString{x}
 	}
+	mStr, sStr, hasSeconds := strings.Cut(rest, ":")
 
-	h, err := strconv.ParseUint(parts[0], 10, 8)
+	h, err := strconv.ParseUint(hStr, 10, 8)
 	if err != nil {
 		return 0, InvalidTimeString{x}
 	}
 
-	m, err := strconv.ParseUint(parts[1], 10, 8)
+	m, err := strconv.ParseUint(mStr, 10, 8)
 	if err != nil {
 		return 0, InvalidTimeString{x}
 	}
 
 	s := uint64(0)
-	if len(parts) == 3 {
-		s, err = strconv.ParseUint(parts[1], 10, 8)
+	if hasSeconds {
+		s, err = strconv.ParseUint(sStr, 10, 8)
 		if err != nil {
 			return 0, InvalidTimeString{x}
 		}
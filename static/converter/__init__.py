@@ -2,27 +2,31 @@
 import csv
 import os
 import re
-from datetime import date, timedelta
+import shutil
+from datetime import date
 from logging import getLogger
-from typing import IO, Dict, List, Literal, Mapping, Optional, Set, Union, cast
+from typing import IO, Dict, List, Literal, Mapping, Optional, Set
 
 from ..const import DIR_SHAPE_ERR, DIR_SINGLE_FEED, HEADERS, RAIL_DIRECTION_STOPS
 from ..downloader import FileInfo
 from ..fares import add_fare_info
 from ..metro import append_metro_schedule
 from ..parser import Parser
-from ..parser.dataobj import ZTMStopTime, ZTMTrip, ZTMVariantStop
+from ..parser.dataobj import ZTMTrip, ZTMVariantStop
 from ..shapes import Shaper
-from ..util import (ConversionOpts, CsvWriter, clear_directory, compress,
-                    ensure_dir_exists, prepare_tempdir)
+from ..util import (ConversionOpts, CsvWriter, compress, ensure_dir_exists,
+                    prepare_tempdir)
 from .helpers import (DirStopsType, FileNamespace, get_proper_headsign,
                       get_route_color_type, get_trip_direction, match_day_type)
-from .platformhandler import PlatformHandler, PlatformLookupQuery
+from .platformhandler import STATION_HAFAS_IDS, PlatformHandler, PlatformLookupQuery
 from .static_files import static_all
 from .stophandler import StopHandler
 
 # cSpell: words WGOD
 
+# Basic assumption that SKM numbers are 5-digit
+_SKM_TRAIN_NUMBER = re.compile(r"[0-9]{5}")
+
 
 class Converter:
     def __init__(self, version: str, parser: Parser, target_dir: str, start_date: date,
@@ -38,6 +42,7 @@ class Converter:
         # Data-related properties
         self.calendar_start = start_date
         self.calendars: Dict[date, List[str]] = {}
+        self.potential_dates: Dict[str, Set[date]] = {}
         self.routes: List[str] = []
         self.stops = StopHandler(version)
         self.platforms = PlatformHandler.instance()
@@ -72,7 +77,8 @@ class Converter:
     def open_files(self) -> None:
         """Open file handlers used when converting"""
         def get_file_obj(name: str) -> IO[str]:
-            return open(os.path.join(self.target_dir, name), mode="w", encoding="utf8", newline="")
+            return open(os.path.join(self.target_dir, name), mode="w", encoding="utf8", newline="",
+                        buffering=1024 * 1024)
 
         def get_writer(name: str, fileobj: IO[str]) -> "CsvWriter":
             wrtr = csv.writer(fileobj)
@@ -121,11 +127,16 @@ class Converter:
             self.stops.load_group(group, stops)
 
     def _get_potential_dates(self, day_type: str) -> Set[date]:
-        return {
-            day
-            for day, potential_day_types in self.calendars.items()
-            if day_type in potential_day_types
-        }
+        # Cached - this is called for every train, and calendars don't change after get_calendars
+        dates = self.potential_dates.get(day_type)
+        if dates is None:
+            dates = {
+                day
+                for day, potential_day_types in self.calendars.items()
+                if day_type in potential_day_types
+            }
+            self.potential_dates[day_type] = dates
+        return dates
 
     # Route data converters
 
@@ -143,9 +154,8 @@ class Converter:
                 trip.train_number = new_number
 
             else:
-                # Basic assumption that SKM numbers are 5-digit
-                assert re.match(r"[0-9]{5}", trip.train_number)
-                assert re.match(r"[0-9]{5}", new_number)
+                assert _SKM_TRAIN_NUMBER.match(trip.train_number)
+                assert _SKM_TRAIN_NUMBER.match(new_number)
 
                 # The numbers should differ by one, and the bigger should be odd
                 numbers = [int(trip.train_number), int(new_number)]
@@ -206,8 +216,8 @@ class Converter:
         for stopt in trip.stops:
             real_stop = self.stops.get_id(stopt.stop, stopt.platform)
             if real_stop:
-                new_stops.append(ZTMStopTime(real_stop, stopt.original_stop, stopt.time,
-                                             stopt.flags, stopt.platform))
+                stopt.stop = real_stop
+                new_stops.append(stopt)
 
         trip.stops = new_stops
 
@@ -217,15 +227,23 @@ class Converter:
         headsign = self.stops.names.get(trip.stops[-1].stop[:4], "")
         potential_active_dates = self._get_potential_dates(day_type)
 
+        last_stopt = trip.stops[-1]
+
         for stopt in trip.stops:
+            # Only a handful of stations have platform data -
+            # skip building lookup queries for every other stop
+            station_id = stopt.stop[:4]
+            if station_id not in STATION_HAFAS_IDS:
+                continue
+
             platform_entry = self.platforms.get_entry(PlatformLookupQuery(
-                station_id=stopt.stop[:4],
+                station_id=station_id,
                 gtfs_time=stopt.time,
                 route=self.route_id,
                 headsign=headsign,
                 train_dates=potential_active_dates,
                 calendar_start=self.calendar_start,
-                is_last=stopt is trip.stops[-1],
+                is_last=stopt is last_stopt,
                 matched_number=trip.train_number,
             ))
 
@@ -297,8 +315,7 @@ class Converter:
                 continue
 
             # Set exceptional trips
-            exceptional = "0" if variant_id.startswith("TP-") or variant_id.startswith("TO-") \
-                else "1"
+            exceptional = "0" if variant_id.startswith(("TP-", "TO-")) else "1"
 
             # Wheelchair accessibility
             wheelchair = "2" if trip.id in self.inaccessible_trips else "1"
@@ -306,8 +323,8 @@ class Converter:
             # Direction
             if self.route_type == "2":
                 direction = self._normalize_train_direction(trip)
-            elif variant_id in self.variant_direction:
-                direction = self.variant_direction[variant_id]
+            elif (cached_direction := self.variant_direction.get(variant_id)) is not None:
+                direction = cached_direction
             else:
                 direction = get_trip_direction(
                     {i.original_stop for i in trip.stops},
@@ -355,6 +372,7 @@ class Converter:
             ])
 
             # Convert stoptimes
+            times_rows = []
             max_seq = len(trip.stops) - 1
             for seq, stopt in enumerate(trip.stops):
                 # Pickup Type
@@ -381,8 +399,7 @@ class Converter:
                 # Get shape_dist_travelled
                 stopt_dist = stop_dist_traveled.get(seq, 0.0)
 
-                # Write to stop_times.txt
-                self.wrtr.times.writerow([
+                times_rows.append([
                     trip.id,
                     stopt.time,
                     stopt.time,
@@ -394,6 +411,9 @@ class Converter:
                     stopt.platform,
                 ])
 
+            # Write to stop_times.txt
+            self.wrtr.times.writerows(times_rows)
+
     def save_schedules(self) -> None:
         """Convert schedules into GTFS. Exhausts self.parser.parse_ll."""
         route_sort_order = 1  # First 2 are reserved for M1 and M2
@@ -405,7 +425,7 @@ class Converter:
             self.route_id = route.id
 
             # Ignore Koleje Mazowieckie & Warszawska Kolej Dojazdowa routes
-            if self.route_id.startswith("R") or self.route_id.startswith("WKD"):
+            if self.route_id.startswith(("R", "WKD")):
                 raise ValueError(f"Unexpected non-ZTM railway route: {self.route_id}")
 
             self.routes.append(self.route_id)
@@ -461,9 +481,7 @@ class Converter:
             clear_shape_errors: bool = True) -> None:
 
         # Open the ZTM txt file and wrap a Parser around it
-        with open(finfo.path, mode="r", encoding="windows-1250") as f:
-            parser = Parser(f, finfo.version)
-
+        with Parser.from_path(finfo.path, finfo.version) as parser:
             # Make the directory for the gtfs files
             if in_temp_dir:
                 target_dir = prepare_tempdir(finfo.version)
@@ -517,5 +535,4 @@ class Converter:
 
         # Remove the tempdir after working with it
         if in_temp_dir:
-            clear_directory(target_dir)
-            os.rmdir(target_dir)
+            shutil.rmtree(target_dir)
@@ -62,17 +62,15 @@ def get_trip_direction(trip_original_stops: Set[str], direction_stops: DirStopsT
     a direction_stops which should be a dictionary with 2 keys: "0" and "1" -
     corresponding values should be sets of stops encountered in given dir
     """
-    # Stops for each direction have to be unique
-    dir_stops_0 = direction_stops["0"].difference(direction_stops["1"])
-    dir_stops_1 = direction_stops["1"].difference(direction_stops["0"])
+    # Trip stops encountered in direction 0 and direction 1.
+    # Intersecting with the (small) trip set first avoids building
+    # the per-direction unique sets over all stops of the route.
+    trip_stops_0 = trip_original_stops.intersection(direction_stops["0"])
+    trip_stops_1 = trip_original_stops.intersection(direction_stops["1"])
 
-    # Trip stops in direction 0 and direction 1
-    trip_stops_0 = trip_original_stops.intersection(dir_stops_0)
-    trip_stops_1 = trip_original_stops.intersection(dir_stops_1)
-
-    # Amount of stops of trip in each direction
-    trip_stops_0_len = len(trip_stops_0)
-    trip_stops_1_len = len(trip_stops_1)
+    # Amount of trip stops unique to each direction
+    trip_stops_0_len = len(trip_stops_0 - trip_stops_1)
+    trip_stops_1_len = len(trip_stops_1 - trip_stops_0)
 
     # More or equal stops belonging to dir_0 then dir_1 => "0"
     if trip_stops_0_len >= trip_stops_1_len:
@@ -88,16 +86,21 @@ def get_trip_direction(trip_original_stops: Set[str], direction_stops: DirStopsT
                            f"{trip_stops_1_len}")
 
 
+# Special headsigns for trips ending at specific stops
+_STOP_HEADSIGNS: Dict[str, str] = {
+    "503803": "Zjazd do zajezdni Wola",
+    "503804": "Zjazd do zajezdni Wola",
+    "103002": "Zjazd do zajezdni Praga",
+    "324010": "Zjazd do zajezdni Mokotów",
+    "606107": "Zjazd do zajezdni Żoliborz",
+    "606108": "Zjazd do zajezdni Żoliborz",
+}
+
+
 def get_proper_headsign(stop_id: str, stop_name: str) -> str:
     """Get trip_headsign based on last stop_id and its stop_name"""
-    if stop_id in ["503803", "503804"]:
-        return "Zjazd do zajezdni Wola"
-    elif stop_id == "103002":
-        return "Zjazd do zajezdni Praga"
-    elif stop_id == "324010":
-        return "Zjazd do zajezdni Mokotów"
-    elif stop_id in {"606107", "606108"}:
-        return "Zjazd do zajezdni Żoliborz"
+    if stop_id in _STOP_HEADSIGNS:
+        return _STOP_HEADSIGNS[stop_id]
     elif stop_id.startswith("4202"):
         return "Lotnisko Chopina"
     else:
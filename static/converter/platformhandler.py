@@ -5,7 +5,8 @@ from datetime import date, timedelta
 from math import inf
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
-import requests
+from ..util import http_session
+
 
 ROMAN_TO_INT = {
     "I": "1", "II": "2", "III": "3", "IV": "4", "V": "5",
@@ -102,7 +103,7 @@ class PlatformHandler:
 
     def load_data(self) -> None:
         """Loads data from the external API"""
-        s = requests.Session()
+        s = http_session()
         self.arrivals.clear()
         self.departures.clear()
 
@@ -164,15 +165,6 @@ class PlatformHandler:
                 # No similar entry - just insert it
                 into[time].append(entry)
 
-    @staticmethod
-    def _has_entry(entries: List[PlatformEntry]) -> Tuple[bool, Optional[PlatformEntry]]:
-        if not entries:
-            return True, None
-        elif len(entries) == 1:
-            return True, entries[0]
-        else:
-            return False, None
-
     @staticmethod
     def _single_result(entries: List[PlatformEntry], *filters: PlatformFilter) \
             -> Optional[PlatformEntry]:
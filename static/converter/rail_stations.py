@@ -1,8 +1,7 @@
 from dataclasses import dataclass, field
 from typing import (Dict, FrozenSet, List, Literal, Mapping, NamedTuple,
                     Optional, Tuple)
-from xml.sax import parse as sax_parse
-from xml.sax.handler import ContentHandler as SAXContentHandler
+from xml.parsers.expat import ParserCreate
 
 
 class RailwayPlatform(NamedTuple):
@@ -34,9 +33,8 @@ def _parse_tristate(value: Optional[str]) -> Literal["0", "1", "2"]:
         return "2"
 
 
-class RailwayStationLoader(SAXContentHandler):
+class RailwayStationLoader:
     def __init__(self) -> None:
-        super().__init__()
         self.tags: Dict[str, str] = {}
         self.position: Tuple[float, float] = float("nan"), float("nan")
         self.stations: Dict[str, RailwayStation] = {}
@@ -86,9 +84,14 @@ class RailwayStationLoader(SAXContentHandler):
     def load_all(cls, path: str) -> Dict[str, RailwayStation]:
         handler = cls()
 
-        # Load the file
+        # Load the file - expat handlers are set directly, skipping the overhead of xml.sax
+        # wrapping every callback and attribute mapping
+        parser = ParserCreate()
+        parser.StartElementHandler = handler.startElement
+        parser.EndElementHandler = handler.endElement
+
         with open(path, "rb") as stream:
-            sax_parse(stream, handler)
+            parser.ParseFile(stream)
 
         # Post-process platforms
         stations_with_missing_platforms: list[str] = []
@@ -1,18 +1,18 @@
 import csv
 import json
 import os
+import re
 from functools import lru_cache
 from logging import getLogger
+from math import fsum
 from os.path import join
 from tempfile import NamedTemporaryFile
 from typing import (Any, Callable, Dict, Iterable, List, Optional, Sequence,
                     Set, Tuple)
 
-import requests
-
 from ..const import GIST_MISSING_STOPS, GIST_STOP_NAMES, HEADERS, RAILWAY_MAP
 from ..parser.dataobj import ZTMStop, ZTMStopGroup
-from ..util import is_railway_station
+from ..util import http_session, is_railway_station
 from .rail_stations import RailwayStation, RailwayStationLoader
 
 """
@@ -24,62 +24,68 @@ and all that kind of jazz.
 """
 
 
+# Spacing fixes applied to every stop name
+_NAME_SPACING = str.maketrans({".": ". ", "-": " - "})
+
+# Words whose capitalization should be fixed in stop names
+_NAME_WORD_FIXES = {
+    "al.": "Al.",
+    "pl.": "Pl.",
+    "os.": "Os.",
+    "ks.": "Ks.",
+    "św.": "Św.",
+    "Ak ": "AK ",
+    "Ch ": "CH ",
+    "gen.": "Gen.",
+    "rondo ": "Rondo ",
+    "most ": "Most ",
+}
+_NAME_WORD_FIXES_RE = re.compile("|".join(re.escape(i) for i in _NAME_WORD_FIXES))
+
+
 def normalize_stop_name(name: str) -> str:
     """Attempts to fix stop names provided by ZTM"""
     # add .title() if ZTM provides names in ALL-UPPER CASE again
-    name = name.replace(".", ". ")      \
-               .replace("-", " - ")     \
-               .replace("  ", " ")      \
-               .replace("al.", "Al.")   \
-               .replace("pl.", "Pl.")   \
-               .replace("os.", "Os.")   \
-               .replace("ks.", "Ks.")   \
-               .replace("św.", "Św.")   \
-               .replace("Ak ", "AK ")   \
-               .replace("Ch ", "CH ")   \
-               .replace("gen.", "Gen.") \
-               .replace("rondo ", "Rondo ") \
-               .replace("most ", "Most ") \
-               .rstrip()
-
-    return name
+    name = name.translate(_NAME_SPACING).replace("  ", " ")
+    name = _NAME_WORD_FIXES_RE.sub(lambda m: _NAME_WORD_FIXES[m[0]], name)
+    return name.rstrip()
+
+
+# List of conditions that, if true, mean town name shouldn't be added.
+# Cheapest conditions go first, as any() stops at the first matching one.
+_DO_NOT_ADD_TOWN_CONDITIONS: Tuple[Callable[[ZTMStopGroup], bool], ...] = (
+    lambda g: g.town_code == "--",       # Stops in Warsaw
+    lambda g: is_railway_station(g.id),  # Railway stations
+    lambda g: "PKP" in g.name,  # Stops near train stations
+    lambda g: "WKD" in g.name,  # Stops near WKD stations
+    lambda g: g.town.casefold() in g.name.casefold(),  # Town name is already in stop name
+
+    # Any part of town name is already in the stop name
+    lambda g: any(part in g.name.casefold() for part in g.town.casefold().split(" ")),
+)
 
 
 def should_town_be_added_to_name(group: ZTMStopGroup) -> bool:
     """Checks whether town name should be added to the stop name"""
-    # List of conditions that, if true, mean town name shouldn't be added
-    do_not_add_conditions: Set[Callable[[ZTMStopGroup], bool]] = {
-        lambda g: g.town_code == "--",       # Stops in Warsaw
-        lambda g: is_railway_station(g.id),  # Railway stations
-        lambda g: "PKP" in g.name,  # Stops near train stations
-        lambda g: "WKD" in g.name,  # Stops near WKD stations
-        lambda g: g.town.casefold() in g.name.casefold(),  # Town name is already in stop name
-
-        # Any part of town name is already in the stop name
-        lambda g: any(part in g.name.casefold() for part in g.town.casefold().split(" "))
-    }
-
     # Check if all do_not_add_conditions fail
-    return not any(rule(group) for rule in do_not_add_conditions)
+    return not any(rule(group) for rule in _DO_NOT_ADD_TOWN_CONDITIONS)
 
 
 def avg_position(stops: Sequence[ZTMStop]) -> Optional[Tuple[float, float]]:
-    """Returns the average position of all stops"""
-    # cSpell: word lons
-    lats = (i.lat for i in stops if i.lat is not None)
-    lons = (i.lon for i in stops if i.lon is not None)
-    count = len(stops)
+    """Returns the average position of all stops with a known position"""
+    positions = [(i.lat, i.lon) for i in stops if i.lat is not None and i.lon is not None]
+    count = len(positions)
 
     if count < 1:
         return None
 
-    return sum(lats) / count, sum(lons) / count
+    return fsum(i[0] for i in positions) / count, fsum(i[1] for i in positions) / count
 
 
 @lru_cache(maxsize=None)
 def get_missing_stops() -> Dict[str, Tuple[float, float]]:
     """Gets positions of stops from external gist, as ZTM sometimes omits stop coordinates"""
-    with requests.get(GIST_MISSING_STOPS) as req:
+    with http_session().get(GIST_MISSING_STOPS) as req:
         req.raise_for_status()
         return req.json()
 
@@ -89,9 +95,9 @@ def get_rail_platforms() -> Dict[str, RailwayStation]:
     """Gets info about railway stations from external gist"""
     with NamedTemporaryFile(mode="r+b") as f:
         # Download the map
-        with requests.get(RAILWAY_MAP, stream=True) as req:
+        with http_session().get(RAILWAY_MAP, stream=True) as req:
             req.raise_for_status()
-            for chunk in req.iter_content():
+            for chunk in req.iter_content(1024 * 128):
                 f.write(chunk)
 
         # Load the data
@@ -102,7 +108,7 @@ def get_rail_platforms() -> Dict[str, RailwayStation]:
 @lru_cache(maxsize=None)
 def get_stop_names() -> Dict[str, str]:
     """Gets fixed stop names for some of the groups"""
-    with requests.get(GIST_STOP_NAMES) as req:
+    with http_session().get(GIST_STOP_NAMES) as req:
         req.raise_for_status()
         return req.json()
 
@@ -424,9 +430,7 @@ class StopHandler:
                     writer.writerow(stop_data)
 
         # Calculate unused entries from missing_stops.json
-        unused_missing = set(self.missing_stops.keys()) \
-            .difference(self.used_invalid) \
-            .difference(self.used)
+        unused_missing = self.missing_stops.keys() - self.used_invalid - self.used
 
         # Dump missing stops info
         self.logger.info("Exporting missing_stops.json")
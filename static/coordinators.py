@@ -1,3 +1,5 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 from copy import copy
 from datetime import date, datetime
 from os.path import join
@@ -9,10 +11,13 @@ from static.shapes import Shaper
 
 from .const import DIR_CONVERTED, DIR_SHAPE_ERR
 from .converter import Converter
-from .downloader import (append_modtimes, mark_as_converted, sync_files,
-                         sync_single_file)
+from .converter.platformhandler import PlatformHandler
+from .converter.stophandler import (get_missing_stops, get_rail_platforms,
+                                    get_stop_names)
+from .downloader import (FileInfo, append_modtimes, mark_as_converted,
+                         sync_files, sync_single_file)
 from .merger import Merger
-from .util import ConversionOpts, ensure_dir_exists
+from .util import ConversionOpts, ensure_dir_exists, http_session
 
 """
 Module contains function that coordinate file synchronization with GTFS convertions.
@@ -21,6 +26,27 @@ Module contains function that coordinate file synchronization with GTFS converti
 # cSpell: words remerge
 
 
+def _single_file_opts(opts: ConversionOpts, file: FileInfo) -> ConversionOpts:
+    """Options for converting one of multiple files, before they're merged"""
+    file_opts = copy(opts)
+    file_opts.metro = False
+    file_opts.target = join(DIR_CONVERTED, (file.version + ".zip"))
+    return file_opts
+
+
+def _preload_external_data() -> None:
+    """Downloads external data used by every conversion, so that forked
+    conversion workers inherit it instead of each downloading it again"""
+    PlatformHandler.instance()
+    get_rail_platforms()
+    get_missing_stops()
+    get_stop_names()
+
+    # Don't share pooled connections with the forked workers
+    http_session().close()
+    http_session.cache_clear()
+
+
 def make_single(opts: ConversionOpts, for_day: Optional[date] = None) -> str:
     # Get file
     opts.sync_time = datetime.now(timezone("Europe/Warsaw")).strftime("%Y-%m-%d %H:%M:%S")
@@ -50,23 +76,16 @@ def make_multiple(
     files_to_convert = [i for i in files if not i.is_converted] if changed else []
 
     # Convert files if some should be converted
-    if changed:
-        # Create a shaper object
-        if opts.shapes:
-            # Clear shape errors
-            ensure_dir_exists(DIR_SHAPE_ERR, True)
-            shaper = Shaper(opts.simplify_shapes)
-        else:
-            shaper = None
+    if changed and opts.shapes:
+        # Clear shape errors and create a Shaper shared between all conversions.
+        # Loading the routing graphs is expensive, so files are converted sequentially.
+        ensure_dir_exists(DIR_SHAPE_ERR, True)
+        shaper = Shaper(opts.simplify_shapes)
 
         for file in files_to_convert:
-            file_opts = copy(opts)
-            file_opts.metro = False
-            file_opts.target = join(DIR_CONVERTED, (file.version + ".zip"))
-
             Converter.create(
                 file,
-                file_opts,
+                _single_file_opts(opts, file),
                 in_temp_dir=False,
                 shaper_obj=shaper,
                 clear_shape_errors=False)
@@ -74,6 +93,24 @@ def make_multiple(
             mark_as_converted(file)
             append_modtimes(file)
 
+    elif changed and files_to_convert:
+        # Without shapes, conversions are independent and CPU-bound - run them in parallel.
+        # Each conversion works in its own temporary directory.
+        _preload_external_data()
+        workers = min(len(files_to_convert), os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            conversions = [
+                executor.submit(Converter.create, file, _single_file_opts(opts, file),
+                                in_temp_dir=True)
+                for file in files_to_convert
+            ]
+
+            for file, conversion in zip(files_to_convert, conversions):
+                conversion.result()
+                mark_as_converted(file)
+                append_modtimes(file)
+
     # Merge feeds
     Merger.create(files, opts, in_temp_dir=False)
 
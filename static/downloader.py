@@ -1,9 +1,9 @@
-import fnmatch
 import ftplib
 import json
 import logging
 import os
 import re
+from bisect import bisect_right
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from operator import itemgetter
@@ -27,6 +27,8 @@ Main functionality is exposed in the sync_feeds() and append_modtimes() procedur
 
 _logger = logging.getLogger("WarsawGTFS.downloader")
 
+_SCHEDULE_FILE_NAME = re.compile(r"RA\d{6}\.7z")
+
 
 @dataclass
 class FileInfo:
@@ -103,6 +105,19 @@ def remove_unused_converted(versions_ok: Set[str], current_modtimes: Dict[str, s
     write_modtimes(new_modtimes)
 
 
+def list_schedule_files(ftp: ftplib.FTP) -> List[Tuple[str, date, Dict[str, str]]]:
+    """Lists schedule files available on the FTP server.
+    Returns (file_name, start_date, file_meta) tuples, sorted by start_date.
+    """
+    files = [
+        (file_name, datetime.strptime(file_name, "RA%y%m%d.7z").date(), file_meta)
+        for file_name, file_meta in ftp.mlsd()
+        if _SCHEDULE_FILE_NAME.fullmatch(file_name)
+    ]
+    files.sort(key=itemgetter(1))
+    return files
+
+
 def list_files(ftp: ftplib.FTP, max_files: int = 5,
                start_date: Optional[date] = None) -> List[FileInfo]:
     """Lists all files required to create a valid feed.
@@ -110,14 +125,7 @@ def list_files(ftp: ftplib.FTP, max_files: int = 5,
     Required files are evaulated starting from start_date, which defaults to 'today' in Warsaw.
     """
     _logger.info("calculating required files")
-    files = ftp.mlsd()
-    fn_match = re.compile(r"^RA\d{6}\.7z")
-
-    # Ignore non-schedule files & sort files by date
-    files = sorted(
-        filter(lambda i: fn_match.fullmatch(str(i[0])), files),
-        key=itemgetter(0)
-    )
+    files = list_schedule_files(ftp)
 
     # User hasn't specified when the feed should be valid: start from 'today' (in Warsaw)
     if start_date is None:
@@ -126,14 +134,11 @@ def list_files(ftp: ftplib.FTP, max_files: int = 5,
     active_files: List[FileInfo] = []
 
     # Check which files should be converted
-    for idx, (file_name, file_meta) in enumerate(files):
-        file_start = datetime.strptime(file_name, "RA%y%m%d.7z").date()
-
+    for idx, (file_name, file_start, file_meta) in enumerate(files):
         # Get last day when file is active (next file - 1 day)
-        try:
-            file_end = datetime.strptime(str(files[idx + 1][0]), "RA%y%m%d.7z").date()
-            file_end -= timedelta(days=1)
-        except IndexError:
+        if idx + 1 < len(files):
+            file_end = files[idx + 1][1] - timedelta(days=1)
+        else:
             file_end = date.max
 
         # We don't need anything for previous dates
@@ -141,7 +146,7 @@ def list_files(ftp: ftplib.FTP, max_files: int = 5,
             continue
 
         active_files.append(FileInfo(
-            path=file_name, version=file_name[:-3], modtime=file_meta["modify"],
+            path=file_name, version=os.path.splitext(file_name)[0], modtime=file_meta["modify"],
             start=file_start, end=file_end, is_converted=False
         ))
 
@@ -156,49 +161,26 @@ def list_files(ftp: ftplib.FTP, max_files: int = 5,
 
 def list_single_file(ftp: ftplib.FTP, for_day: Optional[date] = None) -> FileInfo:
     """Returns FileInfo about file valid in the given day (or today in Warsaw)"""
-    # Variables from loop
-    file_name = ""
-    file_meta = {}
-    file_start = date.min
-
-    # List files from FTP
-    files = ftp.mlsd()
-    fn_match = re.compile(r"^RA\d{6}\.7z")
-
-    # Ignore non-schedule files & sort files by date
-    files = sorted(
-        filter(lambda i: fn_match.fullmatch(str(i[0])), files),
-        key=itemgetter(0)
-    )
+    files = list_schedule_files(ftp)
 
     # Ensure for_day is not None
     if for_day is None:
         for_day = datetime.now(timezone("Europe/Warsaw")).date()
 
-    # Iterate over files and to get one valid for `for_day`
-    max_idx = len(files) - 1
-    for idx, (file_name, file_meta) in enumerate(files):
-        file_start = datetime.strptime(file_name, "RA%y%m%d.7z").date()
-
-        # If user requested file before the very first file - raise an error
-        if idx == 0 and for_day < file_start:
-            raise FileNotFoundError(f"No files for day {for_day.strftime('%Y-%m-%d')}")
-
-        # Last file always matches
-        if idx != max_idx:
-            next_file_start = datetime.strptime(str(files[idx + 1][0]), "RA%y%m%d.7z").date()
-
-            # Next file starts past for_day, so current file matches - break out of the loop
-            if next_file_start > for_day:
-                break
-
     # guard against no matches
-    if not file_name:
+    if not files:
         raise FileNotFoundError(f"Error matching files for day {for_day.strftime('%Y-%m-%d')}")
 
-    # file_path, file_start and file_meta now contain info about matched file
+    # Find the last file starting on or before for_day
+    idx = bisect_right([i[1] for i in files], for_day) - 1
+
+    # If user requested file before the very first file - raise an error
+    if idx < 0:
+        raise FileNotFoundError(f"No files for day {for_day.strftime('%Y-%m-%d')}")
+
+    file_name, file_start, file_meta = files[idx]
     return FileInfo(
-        path=file_name, version=file_name[:-3], modtime=file_meta["modify"],
+        path=file_name, version=os.path.splitext(file_name)[0], modtime=file_meta["modify"],
         start=file_start, end=date.max, is_converted=False
     )
 
@@ -217,7 +199,7 @@ def get_and_decompress(ftp: ftplib.FTP, i: FileInfo) -> None:
 
     _logger.debug(f"Downloading file for version {i.version}")
     with open(archive_local_path, mode="wb") as f:
-        ftp.retrbinary("RETR " + str(i.path), f.write)
+        ftp.retrbinary("RETR " + str(i.path), f.write, blocksize=1024 * 1024)
 
     # Open the 7z file and decompress the txt file
     _logger.debug(f"Decompressing file for version {i.version}")
@@ -1,7 +1,8 @@
 import csv
+from io import StringIO
 from itertools import chain, combinations, product
 from os.path import join
-from typing import Iterable, Iterator, Sequence, Tuple, TypeVar
+from typing import Iterable, Iterator, List, Sequence, Tuple, TypeVar
 
 from ..const import HEADERS
 from ..util import CsvWriter
@@ -27,16 +28,25 @@ def write_rules(rule_writer: CsvWriter, fare_id: str, zones: Iterable[str],
     """Writes info about valid zones and routes of a particular fare to fare_rules.txt"""
 
     # Each route has to pass through every mentioned zone for fare to be applicable
-    for route, zone in product(routes, zones):
-        rule_writer.writerow([fare_id, route, zone])
+    rule_writer.writerows((fare_id, route, zone) for route, zone in product(routes, zones))
 
 
 def write_regular_fare(attr_writer: CsvWriter, rule_writer: CsvWriter,
-                       fare: _RegularFare, all_routes: Sequence[str]) -> None:
-    """Saves info about a RegularFare"""
+                       fare: _RegularFare, non_l_routes: Sequence[str]) -> None:
+    """Saves info about a RegularFare.
+    `non_l_routes` should contain all routes, except for the L-routes.
+    """
     # GTFS fare applies if a journey passes through ALL `contains_id` zones.
     # ZTM tickets apply to ANY combination of zones mentioned in `fare["zones"]`.
     # Therefore, a separate fare_id has to be created for every combination of zones in given fare
+
+    # Filter routes
+    if not fare["in_L"]:
+        routes = non_l_routes
+    else:
+        # If fare applies to all routes, no route_id should be mentioned in fare_rules.txt
+        routes = [""]
+
     for zones in any_len_combinations(fare["zones"]):
         fare_id = fare["id"] + "_COMBINATION" + "+".join(zones)
 
@@ -51,22 +61,17 @@ def write_regular_fare(attr_writer: CsvWriter, rule_writer: CsvWriter,
             fare["duration"],
         ])
 
-        # Filter routes
-        if not fare["in_L"]:
-            routes = filter(lambda i: not i.startswith("L"), all_routes)
-        else:
-            # If fare applies to all routes, no route_id should be mentioned in fare_rules.txt
-            routes = [""]
-
         # Write to fare_rules.txt
         write_rules(rule_writer, fare_id, zones, routes)
 
 
 def write_lroute_fare(attr_writer: CsvWriter, rule_writer: CsvWriter, fare: _LFare,
-                      all_routes: Sequence[str]) -> None:
-    """Saves info about a LFare"""
+                      l_routes: Sequence[str]) -> None:
+    """Saves info about a LFare.
+    `l_routes` should contain all L-routes.
+    """
     # Filter routes
-    routes = [route for route in all_routes if route in fare["routes"]]
+    routes = [route for route in l_routes if route in fare["routes"]]
 
     # No active routes applicable for this fare - don't write this fare
     if not routes:
@@ -97,21 +102,35 @@ def add_fare_info(target_dir: str, all_routes: Sequence[str]) -> None:
     attr_path = join(target_dir, "fare_attributes.txt")
     rule_path = join(target_dir, "fare_rules.txt")
 
-    # Open those files for writing
-    with open(attr_path, "w", encoding="utf-8", newline="") as attr_buff, \
-            open(rule_path, "w", encoding="utf-8", newline="") as rule_buff:
-        # Create CSV writer for fare_attributes
-        attr_writer = csv.writer(attr_buff)
-        attr_writer.writerow(HEADERS["fare_attributes.txt"])
+    # Collect both files in memory - they are small, and written with lots of tiny rows
+    attr_buff = StringIO()
+    rule_buff = StringIO()
+
+    # Create CSV writer for fare_attributes
+    attr_writer = csv.writer(attr_buff)
+    attr_writer.writerow(HEADERS["fare_attributes.txt"])
+
+    # Create CSV writer for fare_rules
+    rule_writer = csv.writer(rule_buff)
+    rule_writer.writerow(HEADERS["fare_rules.txt"])
+
+    # Split routes into L-routes and other routes
+    l_routes: List[str] = []
+    non_l_routes: List[str] = []
+    for route in all_routes:
+        (l_routes if route.startswith("L") else non_l_routes).append(route)
+
+    # Save info about regular fares
+    for fare in REGULAR_FARES:
+        write_regular_fare(attr_writer, rule_writer, fare, non_l_routes)
 
-        # Create CSV writer for fare_rules
-        rule_writer = csv.writer(rule_buff)
-        rule_writer.writerow(HEADERS["fare_rules.txt"])
+    # Save info about L-route fares
+    for l_fare in LROUTE_FARES:
+        write_lroute_fare(attr_writer, rule_writer, l_fare, l_routes)
 
-        # Save info about regular fares
-        for fare in REGULAR_FARES:
-            write_regular_fare(attr_writer, rule_writer, fare, all_routes)
+    # Write both files at once
+    with open(attr_path, "w", encoding="utf-8", newline="") as f:
+        f.write(attr_buff.getvalue())
 
-        # Save info about L-route fares
-        for l_fare in LROUTE_FARES:
-            write_lroute_fare(attr_writer, rule_writer, l_fare, all_routes)
+    with open(rule_path, "w", encoding="utf-8", newline="") as f:
+        f.write(rule_buff.getvalue())
@@ -1,4 +1,4 @@
-from typing import Iterable, List, Literal, Optional, TypedDict, Union
+from typing import FrozenSet, List, Literal, Optional, TypedDict, Union
 
 """
 Constants describing fares.
@@ -23,7 +23,7 @@ class _LFare(TypedDict):
     id: str
     price: str
     zone_constraint: Optional[str]
-    routes: Iterable[str]
+    routes: FrozenSet[str]
 
 
 # Data
@@ -109,47 +109,47 @@ LROUTE_FARES: "List[_LFare]" = [
         "id": "LRoute-2.00",
         "price": "2.00",
         "zone_constraint": None,
-        "routes": [
+        "routes": frozenset({
             "L-1", "L-3", "L-4", "L-6", "L-7", "L18", "L26", "L27",
             "L29", "L35", "L36", "L37", "L38",
-        ],
+        }),
     },
     {
         "id": "LRoute-3.00",
         "price": "3.00",
         "zone_constraint": None,
-        "routes": [
+        "routes": frozenset({
             "L-8", "L-9", "L10", "L11", "L31", "L33", "L34", "L41", "L49", "L50",
-        ],
+        }),
     },
     {
         "id": "LRoute-3.00-Otwock",
         "price": "3.00",
         "zone_constraint": "2/O",
-        "routes": ["L20", "L22"],
+        "routes": frozenset({"L20", "L22"}),
     },
     {
         "id": "LRoute-3.60",
         "price": "3.60",
         "zone_constraint": None,
-        "routes": [
+        "routes": frozenset({
             "L14", "L15", "L16", "L21", "L28", "L42", "L30",
-        ],
+        }),
     },
     {
         "id": "LRoute-4.00",
         "price": "4.00",
         "zone_constraint": None,
-        "routes": [
+        "routes": frozenset({
             "L20", "L22", "L40", "L43", "L44", "L45", "L47", "L48",
-        ],
+        }),
     },
     {
         "id": "LRoute-5.00",
         "price": "5.00",
         "zone_constraint": None,
-        "routes": [
+        "routes": frozenset({
             "L-2", "L-5", "L12", "L17", "L19", "L13", "L24", "L25", "L32", "L39",
-        ],
+        }),
     }
 ]
@@ -5,9 +5,10 @@ from contextlib import contextmanager
 from datetime import datetime
 from logging import getLogger
 from operator import itemgetter
-from os import rmdir
 from os.path import join
-from typing import IO, Dict, Iterable, List, Set, Tuple
+from shutil import rmtree
+from typing import (IO, Callable, Dict, Iterable, Iterator, List, Optional, Set,
+                    Tuple)
 from zipfile import ZipFile
 
 from pyroutelib3 import distHaversine
@@ -17,8 +18,8 @@ from .converter.static_files import static_all
 from .downloader import FileInfo
 from .fares import add_fare_info
 from .metro import append_metro_schedule
-from .util import (ConversionOpts, clear_directory, compress,
-                   ensure_dir_exists, prepare_tempdir)
+from .util import (ConversionOpts, CsvWriter, compress, ensure_dir_exists,
+                   prepare_tempdir)
 
 """
 Module implements functionality to merge multiple converted GTFS feeds.
@@ -37,6 +38,56 @@ class ZipFileWithCsv(ZipFile):
             txt_buff.close()
             bin_buff.close()
 
+    @contextmanager
+    def open_text(self, fname: str) -> Iterator[IO[str]]:
+        """Yields a text buffer of a file from the archive"""
+        bin_buff = self.open(fname, mode="r")
+        txt_buff = io.TextIOWrapper(bin_buff, encoding="utf-8", newline="")
+
+        try:
+            yield txt_buff
+        finally:
+            txt_buff.close()
+            bin_buff.close()
+
+    @contextmanager
+    def open_rows(self, fname: str, prefilter: Optional[Tuple[str, Set[str]]] = None) \
+            -> Iterator[Iterator[List[str]]]:
+        """Yields an iterator over rows of a CSV file from the archive,
+        with columns ordered as in HEADERS[fname].
+
+        If `prefilter` (a column name and a set of values) is provided, and that column is
+        the first one in the file, lines with other values in that column are skipped before
+        they are even parsed. Callers still have to check the column themselves.
+        """
+        with self.open_text(fname) as txt_buff:
+            in_header = _read_header(txt_buff)
+            lines: Iterable[str] = txt_buff
+
+            # Ids never contain commas or quotes, so the first column
+            # can be extracted from a raw line without a csv parser
+            if prefilter and in_header and in_header[0] == prefilter[0]:
+                values = prefilter[1]
+                lines = (line for line in txt_buff if line[:line.find(",")] in values)
+
+            yield _reorder_columns(csv.reader(lines), in_header, HEADERS[fname])
+
+
+def _read_header(buffer: IO[str]) -> List[str]:
+    """Reads the header row of a CSV file"""
+    return next(csv.reader([buffer.readline()]), [])
+
+
+def _reorder_columns(rows: Iterator[List[str]], in_header: List[str], header: List[str]) \
+        -> Iterator[List[str]]:
+    """Re-orders columns of rows (described by in_header) to match the header"""
+    if in_header == header:
+        return rows
+
+    in_columns = {column: idx for idx, column in enumerate(in_header)}
+    permutation = [in_columns.get(column) for column in header]
+    return ([row[idx] if idx is not None else "" for idx in permutation] for row in rows)
+
 
 class Merger:
 
@@ -51,6 +102,8 @@ class Merger:
         # Data structures for holding merged data
         self.routes: Dict[str, Dict[str, str]] = {}
         self.stops: Dict[str, Dict[str, str]] = {}
+        self.stop_positions: Dict[str, Tuple[float, float]] = {}
+        self.stop_variants: Dict[str, List[Dict[str, str]]] = {}
         self.stop_conversion: Dict[Tuple[str, str], str] = {}
 
         # Per-file attributes
@@ -65,10 +118,10 @@ class Merger:
         self.file_times: IO[str]
         self.file_shapes: IO[str]
 
-        self.wrtr_calendar: csv.DictWriter
-        self.wrtr_trips: csv.DictWriter
-        self.wrtr_times: csv.DictWriter
-        self.wrtr_shapes: csv.DictWriter
+        self.wrtr_calendar: CsvWriter
+        self.wrtr_trips: CsvWriter
+        self.wrtr_times: CsvWriter
+        self.wrtr_shapes: CsvWriter
 
     def _clear_per_file_attrs(self, file: FileInfo) -> None:
         """Clears variables used per each merged feed"""
@@ -82,10 +135,10 @@ class Merger:
         Open files handlers and creates csv writers for
         GTFS files that are written to incrementally.
         """
-        def get_file_wrtr(fname: str) -> Tuple[IO[str], csv.DictWriter]:
+        def get_file_wrtr(fname: str) -> Tuple[IO[str], CsvWriter]:
             f = open(join(self.target_dir, fname), mode="w", encoding="utf-8", newline="")
-            w = csv.DictWriter(f, HEADERS[fname])
-            w.writeheader()
+            w = csv.writer(f)
+            w.writerow(HEADERS[fname])
             return f, w
 
         self.file_calendar, self.wrtr_calendar = get_file_wrtr("calendar_dates.txt")
@@ -108,19 +161,16 @@ class Merger:
 
     # Shortcuts for interacting with loaded data
 
-    def _silimar_stops(self, stop_id: str) -> List[Dict[str, str]]:
-        similar_stops = []
-        suffix = 0
-
-        while (similar_stop := self.stops.get(stop_id + (f"/{suffix}" if suffix else ""))):
-            similar_stops.append(similar_stop)
-            suffix += 1
-
-        return similar_stops
+    def _prefilter(self, fname: str) -> Optional[Tuple[str, Set[str]]]:
+        """Returns a (column, values) pair of rows of fname which might be merged"""
+        if fname == "stop_times.txt":
+            return "trip_id", self.active_trips
+        else:
+            return None
 
-    def _prepend_values_with_version(self, row: Dict[str, str], keys: Iterable[str]) -> None:
-        for k in keys:
-            row[k] = self.file.version + "/" + row[k]
+    def _prepend_values_with_version(self, row: List[str], indices: Iterable[int]) -> None:
+        for idx in indices:
+            row[idx] = self.file.version + "/" + row[idx]
 
     def _get_sorted_route_ids(self) -> List[str]:
         # Divide routes into tram, bus and train for sorting
@@ -148,8 +198,7 @@ class Merger:
         """Loads routes from a reader for later output"""
         self.logger.info(f"Merging {self.file.version}: routes.txt")
         for row in reader:
-            if row["route_id"] not in self.routes:
-                self.routes[row["route_id"]] = row
+            self.routes.setdefault(row["route_id"], row)
 
     def load_stops(self, reader: csv.DictReader) -> None:
         """Loads stops from reader for later output"""
@@ -157,31 +206,35 @@ class Merger:
 
         for row in reader:
             stop_id = row["stop_id"]
+            stop_pos = float(row["stop_lat"]), float(row["stop_lon"])
 
             # If it's the first time we see this stop_id, just save it and continue
             if stop_id not in self.stops:
                 self.stops[stop_id] = row
+                self.stop_positions[stop_id] = stop_pos
+                self.stop_variants[stop_id] = [row]
                 continue
 
             # List all stops with same stop_id
             # If any of them is closer than 10 meters and has the same name:
             # Consider those stops are the same.
-            similar_stops = self._silimar_stops(stop_id)
+            similar_stops = self.stop_variants[stop_id]
+            stop_name = row["stop_name"]
+
             for similar_stop in similar_stops:
+                # Stops with different names are never the same -
+                # no need to calculate the distance between them
+                if similar_stop["stop_name"] != stop_name:
+                    continue
+
                 # Extract some data about the similar stop
                 similar_stop_id = similar_stop["stop_id"]
-                similar_stop_suffix = similar_stop_id.split("/") if "/" in similar_stop_id else ""
-                similar_stop_pos = float(similar_stop["stop_lat"]), float(similar_stop["stop_lon"])
-
-                # Calculate the distance difference
-                distance = distHaversine(
-                    (float(row["stop_lat"]), float(row["stop_lon"])), similar_stop_pos
-                )
+                similar_stop_pos = self.stop_positions[similar_stop_id]
 
                 # Check if the similar stop is "close enough"
-                if distance <= 0.01 and similar_stop["stop_name"] == row["stop_name"]:
+                if distHaversine(stop_pos, similar_stop_pos) <= 0.01:
                     # Only save to stop_conversion if the suffix is set
-                    if similar_stop_suffix:
+                    if "/" in similar_stop_id:
                         self.stop_conversion[self.file.version, stop_id] = similar_stop_id
 
                     break
@@ -202,84 +255,128 @@ class Merger:
                     new_suffix = int(similar_stops[-1]["stop_id"].split("/")[1]) + 1
 
                 # Save the stop under a different id
-                stop_id = stop_id + "/" + str(new_suffix)
-                row["stop_id"] = stop_id
-                self.stops[stop_id] = row
-                self.stop_conversion[(self.file.version, row["stop_id"])] = stop_id
-
-    def merge_calendars(self, reader: csv.DictReader) -> None:
+                new_stop_id = stop_id + "/" + str(new_suffix)
+                row["stop_id"] = new_stop_id
+                self.stops[new_stop_id] = row
+                self.stop_positions[new_stop_id] = stop_pos
+                self.stop_conversion[self.file.version, stop_id] = new_stop_id
+                similar_stops.append(row)
+
+    def merge_calendars(self, rows: Iterable[List[str]]) -> None:
         """Incrementally merge rows from calendar_dates.txt"""
         self.logger.info(f"Merging {self.file.version}: calendar_dates.txt")
 
-        for row in reader:
-            day = datetime.strptime(row["date"], "%Y%m%d").date()
-            if self.file.start <= day <= self.file.end:
+        header = HEADERS["calendar_dates.txt"]
+        service_idx = header.index("service_id")
+        date_idx = header.index("date")
+
+        # Many rows share the same date - only parse and check each date once
+        active_dates: Dict[str, bool] = {}
+
+        for row in rows:
+            date_str = row[date_idx]
+            date_active = active_dates.get(date_str)
+
+            if date_active is None:
+                day = datetime.strptime(date_str, "%Y%m%d").date()
+                date_active = self.file.start <= day <= self.file.end
+                active_dates[date_str] = date_active
+
+            if date_active:
                 # Save outputted primary keys
-                self.active_services.add(row["service_id"])
+                self.active_services.add(row[service_idx])
 
                 # Prepend per-file ids
-                self._prepend_values_with_version(row, {"service_id"})
+                self._prepend_values_with_version(row, (service_idx,))
 
                 # Re-write the row
                 self.wrtr_calendar.writerow(row)
 
-    def merge_trips(self, reader: csv.DictReader) -> None:
+    def merge_trips(self, rows: Iterable[List[str]]) -> None:
         """Incrementally merge rows from trips.txt"""
         self.logger.info(f"Merging {self.file.version}: trips.txt")
 
-        for row in reader:
-            if row["service_id"] in self.active_services:
-                # Save outputted primary keys and
-                # determine which fields should be prepended with feed.version
-                self.active_trips.add(row["trip_id"])
-                prepend_keys = {"trip_id", "service_id"}
+        header = HEADERS["trips.txt"]
+        service_idx = header.index("service_id")
+        trip_idx = header.index("trip_id")
+        shape_idx = header.index("shape_id")
+
+        # Determine which fields should be prepended with feed.version
+        prepend_indices: Tuple[int, ...] = (trip_idx, service_idx)
+        if self.shapes:
+            prepend_indices += (shape_idx,)
+
+        for row in rows:
+            if row[service_idx] in self.active_services:
+                # Save outputted primary keys
+                self.active_trips.add(row[trip_idx])
 
                 if self.shapes:
                     # If shapes are expected to be in the result file -
                     # consider 'shape_id' fields for the above actions
-                    self.active_shapes.add(row["shape_id"])
-                    prepend_keys.add("shape_id")
+                    self.active_shapes.add(row[shape_idx])
                 else:
                     # If no shapes - force-clear the shape_id field.
                     # This is to prevent invalid references if source files have shapes, but
                     # the shape option wasn't set in the Merger
-                    row["shape_id"] = ""
+                    row[shape_idx] = ""
 
-                self._prepend_values_with_version(row, prepend_keys)
+                self._prepend_values_with_version(row, prepend_indices)
 
                 # Re-write the row
                 self.wrtr_trips.writerow(row)
 
-    def merge_times(self, reader: csv.DictReader) -> None:
+    def merge_times(self, rows: Iterable[List[str]]) -> None:
         """Incrementally merge rows from stop_times.txt"""
         self.logger.info(f"Merging {self.file.version}: stop_times.txt")
 
-        for row in reader:
-            if row["trip_id"] in self.active_trips:
+        header = HEADERS["stop_times.txt"]
+        trip_idx = header.index("trip_id")
+        stop_idx = header.index("stop_id")
+        dist_idx = header.index("shape_dist_traveled")
+
+        for row in rows:
+            if row[trip_idx] in self.active_trips:
                 # Prepend per-file ids
-                self._prepend_values_with_version(row, {"trip_id"})
+                self._prepend_values_with_version(row, (trip_idx,))
 
                 # Swap stop_id
-                stop_conversion_key = self.file.version, row["stop_id"]
-                row["stop_id"] = self.stop_conversion.get(stop_conversion_key, row["stop_id"])
+                stop_conversion_key = self.file.version, row[stop_idx]
+                row[stop_idx] = self.stop_conversion.get(stop_conversion_key, row[stop_idx])
 
                 # If no shapes - force-clear the shape_dist_traveled field.
                 # This is to prevent invalid references if source files have shapes, but
                 # the shape option wasn't set in the Merger
                 if not self.shapes:
-                    row["shape_dist_traveled"] = ""
+                    row[dist_idx] = ""
 
                 # Re-write the row
                 self.wrtr_times.writerow(row)
 
-    def merge_shapes(self, reader: csv.DictReader) -> None:
+    def merge_shapes(self, buffer: IO[str]) -> None:
         """Incrementally merge rows from shapes.txt"""
         self.logger.info(f"Merging {self.file.version}: shapes.txt")
 
-        for row in reader:
-            if row["shape_id"] in self.active_shapes:
+        in_header = _read_header(buffer)
+        header = HEADERS["shapes.txt"]
+
+        if in_header == header and header[0] == "shape_id":
+            # Only the shape_id (the first column) is changed, and ids never contain
+            # commas or quotes - so lines can be copied without parsing them
+            prefix = self.file.version + "/"
+            self.file_shapes.writelines(
+                prefix + (line if line.endswith("\n") else line + "\r\n")
+                for line in buffer
+                if line[:line.find(",")] in self.active_shapes
+            )
+            return
+
+        shape_idx = header.index("shape_id")
+
+        for row in _reorder_columns(csv.reader(buffer), in_header, header):
+            if row[shape_idx] in self.active_shapes:
                 # Prepend per-file ids
-                self._prepend_values_with_version(row, {"shape_id"})
+                self._prepend_values_with_version(row, (shape_idx,))
 
                 # Re-write the row
                 self.wrtr_shapes.writerow(row)
@@ -335,25 +432,38 @@ class Merger:
         self = cls(files, target_dir, opts.shapes)
         self._open_incremental_files()
 
-        # Load per-file data
-        feed_loaders = [
+        # Load per-file data.
+        # Routes and stops are kept in memory as dicts,
+        # other files are streamed row-by-row straight into the merged feed.
+        feed_loaders: List[Tuple[str, Callable[[csv.DictReader], None]]] = [
             ("routes.txt", self.load_routes),
             ("stops.txt", self.load_stops),
+        ]
+
+        feed_mergers: List[Tuple[str, Callable[[Iterable[List[str]]], None]]] = [
             ("calendar_dates.txt", self.merge_calendars),
             ("trips.txt", self.merge_trips),
             ("stop_times.txt", self.merge_times),
         ]
 
-        if opts.shapes:
-            feed_loaders.append(("shapes.txt", self.merge_shapes))
-
         for file in files:
             self._clear_per_file_attrs(file)
-            arch = ZipFileWithCsv(file.path)
 
-            for gtfs_fname, operation in feed_loaders:
-                with arch.open_csv(gtfs_fname) as reader:
-                    operation(reader)
+            # Members have to be read in the order of feed_loaders and feed_mergers, as later
+            # files are filtered with ids collected from earlier ones.
+            # Only the archive is opened once.
+            with ZipFileWithCsv(file.path) as arch:
+                for gtfs_fname, load in feed_loaders:
+                    with arch.open_csv(gtfs_fname) as reader:
+                        load(reader)
+
+                for gtfs_fname, merge in feed_mergers:
+                    with arch.open_rows(gtfs_fname, self._prefilter(gtfs_fname)) as rows:
+                        merge(rows)
+
+                if opts.shapes:
+                    with arch.open_text("shapes.txt") as buffer:
+                        self.merge_shapes(buffer)
 
         self._close_incremental_files()
 
@@ -381,5 +491,4 @@ class Merger:
 
         # Remove the tempdir after working with it
         if in_temp_dir:
-            clear_directory(target_dir)
-            rmdir(target_dir)
+            rmtree(target_dir)
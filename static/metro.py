@@ -1,15 +1,15 @@
 import csv
 from contextlib import contextmanager
 from datetime import date, datetime, timedelta
-from io import BytesIO, TextIOWrapper
+from io import TextIOWrapper
 from logging import getLogger
 from os.path import exists, join
+from tempfile import TemporaryFile
 from typing import IO, Dict, Generator, List, Optional, Sequence, Set, Tuple
 from zipfile import ZipFile
 
-import requests
-
 from .const import URL_METRO_GTFS
+from .util import http_session
 
 """
 Module responsible for appending metro schedules.
@@ -27,9 +27,14 @@ def peek_csv_header(file_path: str) -> List[str]:
 
 @contextmanager
 def remote_zipfile(url: str) -> Generator[ZipFile, None, None]:
-    with requests.get(url) as metro_req:
+    # Spool the archive to disk instead of holding the whole response in memory
+    with http_session().get(url, stream=True) as metro_req, TemporaryFile() as metro_buff:
         metro_req.raise_for_status()
-        with BytesIO(metro_req.content) as metro_buff, ZipFile(metro_buff) as metro_arch:
+        for chunk in metro_req.iter_content(1024 * 128):
+            metro_buff.write(chunk)
+
+        metro_buff.seek(0)
+        with ZipFile(metro_buff) as metro_arch:
             yield metro_arch
 
 
@@ -44,22 +49,28 @@ def read_calendars(buffer: IO[str], calendars: Dict[str, List[str]]) \
     max_day: date = date.min
     reader = csv.DictReader(buffer)
 
+    # YYYYMMDD strings sort the same way as dates,
+    # so only the smallest and the biggest one need to be parsed
+    min_day_str: Optional[str] = None
+    max_day_str: Optional[str] = None
+
     for row in reader:
-        day = datetime.strptime(row["date"], "%Y%m%d").date()
+        day_str = row["date"]
 
         # Check if day is smaller then current min_day
-        if day < min_day:
-            min_day = day
+        if min_day_str is None or day_str < min_day_str:
+            min_day_str = day_str
 
         # Check if day is bigger the current max_day
-        if day > max_day:
-            max_day = day
+        if max_day_str is None or day_str > max_day_str:
+            max_day_str = day_str
 
         # Add to `calendar` dict
-        if row["date"] not in calendars:
-            calendars[row["date"]] = [row["service_id"]]
-        else:
-            calendars[row["date"]].append(row["service_id"])
+        calendars.setdefault(day_str, []).append(row["service_id"])
+
+    if min_day_str is not None and max_day_str is not None:
+        min_day = datetime.strptime(min_day_str, "%Y%m%d").date()
+        max_day = datetime.strptime(max_day_str, "%Y%m%d").date()
 
     return calendars, min_day, max_day
 
@@ -137,7 +148,6 @@ def append_routes(metro_arch: ZipFile, gtfs_dir: str) -> List[str]:
     Returns a list of all inserter route_ids
     """
     filename = "routes.txt"
-    inserted_routes = []
     local_file = join(gtfs_dir, filename)
 
     # Get the header of local GTFS file
@@ -149,17 +159,21 @@ def append_routes(metro_arch: ZipFile, gtfs_dir: str) -> List[str]:
             TextIOWrapper(in_binary_buff, encoding="utf-8", newline="") as in_txt_buff:
 
         # Pass file objects into csv readers/writers.
-        reader = csv.DictReader(in_txt_buff)
-        writer = csv.DictWriter(target_buff, fieldnames=header, extrasaction="ignore")
+        reader = csv.reader(in_txt_buff)
+        writer = csv.writer(target_buff)
 
-        for row in reader:
-            # Collect route_id
-            inserted_routes.append(row["route_id"])
+        # Map columns of the local file onto columns of the metro file
+        in_columns = {column: idx for idx, column in enumerate(next(reader))}
+        permutation = [in_columns.get(column) for column in header]
+        route_id_idx = in_columns["route_id"]
 
-            # Pass row to writer
-            writer.writerow(row)
+        # Skip blank lines, like csv.DictReader does
+        rows = [row for row in reader if row]
+        writer.writerows([row[idx] if idx is not None else "" for idx in permutation]
+                         for row in rows)
 
-        target_buff.flush()
+        # Collect route_ids
+        inserted_routes = [row[route_id_idx] for row in rows]
 
     return inserted_routes
 
@@ -188,28 +202,48 @@ def append_from_metro(metro_arch: ZipFile, gtfs_dir: str, filename: str,
             metro_arch.open(filename, "r") as in_binary_buff, \
             TextIOWrapper(in_binary_buff, encoding="utf-8", newline="") as in_txt_buff:
         # Pass file objects into csv readers/writers.
-        reader = csv.DictReader(in_txt_buff)
-        writer = csv.DictWriter(target_buff, fieldnames=header, extrasaction="ignore")
+        reader = csv.reader(in_txt_buff)
+        writer = csv.writer(target_buff)
+
+        # Map columns of the local file onto columns of the metro file
+        in_columns = {column: idx for idx, column in enumerate(next(reader))}
+        permutation = [in_columns.get(column) for column in header]
+
+        filter_idx = in_columns[filter_key] if filter_key is not None else None
+        collect_idx = [in_columns[key] for key in (collect_saved_keys or [])]
 
-        for row in reader:
-            # Check against provided filter
-            if filter_key is not None and row[filter_key] not in filter_values:
-                continue
+        # Special values
+        exceptional_idx = header.index("exceptional") \
+            if filename == "trips.txt" and "exceptional" in header else None
+        agency_idx = header.index("agency_id") \
+            if filename == "routes.txt" and "agency_id" in header else None
 
-            # Set special values
-            if filename == "trips.txt" and not row.get("exceptional", ""):
-                row["exceptional"] = "0"
+        def rows() -> Generator[List[str], None, None]:
+            for row in reader:
+                # Skip blank lines, like csv.DictReader does
+                if not row:
+                    continue
 
-            if filename == "routes.txt":
-                row["agency_id"] = "0"
+                # Check against provided filter
+                if filter_idx is not None and row[filter_idx] not in filter_values:
+                    continue
 
-            # Collect primary keys
-            if collect_saved_keys:
-                for idx, key in enumerate(collect_saved_keys):
-                    collected_keys[idx].add(row[key])
+                # Collect primary keys
+                for collected, idx in zip(collected_keys, collect_idx):
+                    collected.add(row[idx])
 
-            # Pass row to writer
-            writer.writerow(row)
+                out_row = [row[idx] if idx is not None else "" for idx in permutation]
+
+                # Set special values
+                if exceptional_idx is not None and not out_row[exceptional_idx]:
+                    out_row[exceptional_idx] = "0"
+
+                if agency_idx is not None:
+                    out_row[agency_idx] = "0"
+
+                yield out_row
+
+        writer.writerows(rows())
 
     return collected_keys
 
@@ -231,24 +265,16 @@ def copy_from_metro(metro_arch: ZipFile, gtfs_dir: str, filename: str,
             metro_arch.open(filename, "r") as in_binary_buff, \
             TextIOWrapper(in_binary_buff, encoding="utf-8", newline="") as in_txt_buff:
 
-        # Create the reader and get CSV header from it
-        reader = csv.DictReader(in_txt_buff)
+        # Create the reader and writer, copy the CSV header
+        reader = csv.reader(in_txt_buff)
+        writer = csv.writer(target_buff)
 
-        header = reader.fieldnames
-        assert header is not None
-
-        # Create the writer
-        writer = csv.DictWriter(target_buff, fieldnames=header, extrasaction="ignore")
-        writer.writeheader()
-
-        # Re-write each row
-        for row in reader:
-            # Check against provided filter
-            if filter_key is not None and row[filter_key] not in filter_values:
-                continue
+        header = next(reader)
+        writer.writerow(header)
 
-            # Pass row to writer
-            writer.writerow(row)
+        # Re-write rows matching the filter
+        filter_idx = header.index(filter_key)
+        writer.writerows(row for row in reader if row and row[filter_idx] in filter_values)
 
 
 # = Main function = #
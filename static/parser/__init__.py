@@ -1,7 +1,9 @@
 import re
 from datetime import datetime
+from functools import lru_cache
 from logging import getLogger
-from typing import Dict, Iterator, Literal, Protocol
+from sys import intern
+from typing import Dict, Iterator, Literal, Match, Optional, Pattern, Protocol
 
 from ..util import normal_time
 from .dataobj import (ZTMCalendar, ZTMDeparture, ZTMRoute, ZTMRouteVariant,
@@ -16,7 +18,7 @@ As all should use one file object, please make sure
 to exhaust the generator fully (no break statements, please).
 
 Also, please be sure to follow the nesting and order of sections:
-parser = Parser(reader)
+parser = Parser(reader)  # or Parser.from_path(path, version)
 for i in parser.parse_ka(): ...
 for i in parser.parse_zp():
     for j in parser.parser_pr(): ...
@@ -28,14 +30,58 @@ for i in parser.parse_ll():
 parser.close()
 """
 
+# Regular expressions for matching lines inside specific sections
+_ZP_LINE = re.compile(r"(\d{4})\s+([^,]{1,30})[\s,]+([\w-]{2})\s+(.*)")
+
+_PR_LINE = re.compile(r"(\d{4})(\d{2}).+Y=\s*([0-9Yy.]+)\s+X=\s*([0-9Xx.]+)"
+                      r"(?:\s+Pu=([0-9?]))?")
+# Pu= accessibility grade → GTFS wheelchair_boarding; grades above 5 are inaccessible
+_PR_WHEELCHAIR: Dict[Optional[str], Literal["0", "1", "2"]] = {
+    "?": "0",
+    **{str(i): "1" for i in range(0, 6)},
+    **{str(i): "2" for i in range(6, 10)},
+}
+
+_TR_LINE = re.compile(
+    r"([\w-]+)\s*,\s+([^,]{1,30})[\s,]+([\w-]{2})\s+==>\s"
+    r"+([^,]{1,30})[\s,]+([\w-]{2})\s+Kier\. (\w)\s+Poz. (\w)"
+)
+
+# Used with search() - a leading ".*" would make every line backtrack from its very end
+_LW_LINE = re.compile(r"(\d{6})\s+[^,]{1,30}[\s,]+([\w-]{2})\s+\d\d\s+(NŻ|)\s*\|")
+_LW_ZONE = re.compile(r"=+\s+([\w\s]+)\s+=+")
+_LW_ZONES: Dict[str, Literal["1", "1/2", "2"]] = {
+    "PRZYSTANEK GRANICZNY": "1/2",
+    "S T R E F A   1": "1",
+    "S T R E F A   2": "2",
+}
+
+# Python's regex is the same as re2
+_LL_LINE = re.compile(r"Linia:\s+([A-Za-z0-9-]{1,3})  - (.+)")
+
+# Buffer size for reading ZTM files - the default 8 KiB means a read() syscall
+# every ~100 lines of a file which is over 100 MiB.
+_READ_BUFFER = 1 << 20
+
+
+# There are only a few dozen distinct town names, shared by thousands of stop groups
+_title_town = lru_cache(maxsize=None)(str.title)
+
+
+class _DigitsOnlyTable(Dict[int, Optional[int]]):
+    """str.translate table which deletes non-digits, filled lazily per codepoint"""
+
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        self[codepoint] = result = codepoint if chr(codepoint).isdigit() else None
+        return result
+
+
+_DIGITS_ONLY = _DigitsOnlyTable()
+
 
 def _remove_non_digits(text: str) -> str:
     """Removes non-digit characters from text"""
-    result = ""
-    for chr in text:
-        if chr.isdigit():
-            result += chr
-    return result
+    return text if text.isdigit() else text.translate(_DIGITS_ONLY)
 
 
 class _WithReadline(Protocol):
@@ -45,9 +91,27 @@ class _WithReadline(Protocol):
 
 class Parser:
     def __init__(self, reader: _WithReadline, version: str) -> None:
+        """Wraps a Parser around a reader. Callers opening ZTM files themselves
+        should pass the windows-1250 encoding and a large `buffering`."""
         self.r = reader
         self.logger = getLogger(f"WarsawGTFS.{version}.Parser")
 
+    @classmethod
+    def from_path(cls, path: str, version: str) -> "Parser":
+        """Opens a ZTM file with a 1 MiB read buffer; call close() when done"""
+        return cls(open(path, mode="r", encoding="windows-1250", buffering=_READ_BUFFER), version)
+
+    def close(self) -> None:
+        """Closes the underlying reader, if it can be closed"""
+        if (close := getattr(self.r, "close", None)) is not None:
+            close()
+
+    def __enter__(self) -> "Parser":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
     def parse_ka(self) -> Iterator[ZTMCalendar]:
         """
         Skips to section KA and parses data from there.
@@ -57,15 +121,13 @@ class Parser:
         self.skip_to_section("KA")
 
         while (line := self.r.readline()):
-            line = line.strip()
+            # split() already drops surrounding whitespace, no need for strip()
+            line_split = line.split()
 
             # section end
-            if "#KA" in line:
+            if line_split and line_split[0].startswith("#KA"):
                 return
 
-            # regex for KA
-            line_split = line.split()
-
             if len(line_split) < 3:
                 continue
 
@@ -81,79 +143,39 @@ class Parser:
         Skips to section ZP and parses data from there.
         Yields ZTMStopGroup objects.
         """
-        regexp = re.compile(r"(\d{4})\s+([^,]{1,30})[\s,]+([\w-]{2})\s+(.*)")
-        self.skip_to_section("ZP")
-
-        while (line := self.r.readline()):
-            line = line.strip()
-
-            # section end
-            if "#ZP" in line:
-                return
-
-            # regex for ZP
-            line_match = regexp.match(line)
-
-            if not line_match:
-                continue
-
+        for line_match in self._section_matches("ZP", _ZP_LINE):
             # combine data
             yield ZTMStopGroup(
                 id=line_match[1], name=line_match[2],
-                town=line_match[4].title(), town_code=line_match[3],
+                town=_title_town(line_match[4]), town_code=line_match[3],
             )
 
-        raise EOFError("End of ZP section was not reached before EOF!")
-
     def parse_pr(self) -> Iterator[ZTMStop]:
         """
         Skips to next PR section and parses data from there.
         Yields ZTMStop objects.
         """
-        regexp = re.compile(r"(\d{4})(\d{2}).+Y=\s*([0-9Yy.]+)\s+X=\s*([0-9Xx.]+)"
-                            r"(?:\s+Pu=([0-9?]))?")
-        self.skip_to_section("PR")
-
-        while (line := self.r.readline()):
-            line = line.strip()
-
-            # Section end
-            if "#PR" in line:
-                return
-
-            # regex for matching data of a stake inside a group
-            line_match = regexp.match(line)
-
-            if not line_match:
-                continue
-
+        for line_match in self._section_matches("PR", _PR_LINE):
             # parse data
 
-            # convert accessibility info → GTFS
-            accessibility_data = line_match[5]
-            if accessibility_data == "?" or accessibility_data is None:
-                wheelchair = "0"
-            elif int(accessibility_data) > 5:
-                wheelchair = "2"
-            else:
-                wheelchair = "1"
-
-            # convert stop poisition
-            if "y" in line_match[3].lower() or "x" in line_match[4].lower():
-                lat = None
-                lon = None
+            # convert accessibility info → GTFS; "?" or no Pu= means unknown
+            wheelchair = _PR_WHEELCHAIR.get(line_match[5], "0")
 
-            else:
+            # convert stop poisition - unknown positions are written as "yy.yyyyyy"/"xx.xxxxxx"
+            lat: Optional[float]
+            lon: Optional[float]
+            try:
                 lat = float(line_match[3])
                 lon = float(line_match[4])
+            except ValueError:
+                lat = None
+                lon = None
 
             yield ZTMStop(
                 id=(line_match[1] + line_match[2]), code=line_match[2],
                 lat=lat, lon=lon, wheelchair=wheelchair,
             )
 
-        raise EOFError("End of PR section was not reached before EOF!")
-
     def parse_wk(self, route_id: str) -> Iterator[ZTMTrip]:
         """
         Skips to next WK section and parses data from there.
@@ -165,10 +187,11 @@ class Parser:
         trip = ZTMTrip(id="", train_number="", stops=[])
 
         while (line := self.r.readline()):
-            line = line.strip()
+            # split() already drops surrounding whitespace, no need for strip()
+            line_split = line.split()
 
             # section end
-            if "#WK" in line:
+            if line_split and line_split[0].startswith("#WK"):
 
                 # yield last trip
                 if trip.id and trip.stops:
@@ -176,18 +199,19 @@ class Parser:
 
                 return
 
-            # regex for wk
-            line_split = line.split()
-
             if len(line_split) < 4:
                 continue
 
             flags = line_split[4] if len(line_split) >= 5 else ""
 
+            # stop ids repeat across every trip and are used as set/dict keys
+            # later on - keep a single copy of each of them
+            stop_id = intern(line_split[1])
+
             # data conversion
             stopt = ZTMStopTime(
-                stop=line_split[1],
-                original_stop=line_split[1],
+                stop=stop_id,
+                original_stop=stop_id,
                 time=normal_time(line_split[3]),
                 flags=flags,  # type: ignore
                 platform="",
@@ -213,25 +237,7 @@ class Parser:
         Skips to next TR section and parses data from there.
         Yields ZTMRouteVariant objects.
         """
-        regexp = re.compile(
-            r"([\w-]+)\s*,\s+([^,]{1,30})[\s,]+([\w-]{2})\s+==>\s"
-            r"+([^,]{1,30})[\s,]+([\w-]{2})\s+Kier\. (\w)\s+Poz. (\w)"
-        )
-        self.skip_to_section("TR")
-
-        while (line := self.r.readline()):
-            line = line.strip()
-
-            # section end
-            if "#TR" in line:
-                return
-
-            # regex for TR
-            line_match = regexp.match(line)
-
-            if not line_match:
-                continue
-
+        for line_match in self._section_matches("TR", _TR_LINE):
             # data conversion
             yield ZTMRouteVariant(
                 id=line_match[1],
@@ -239,17 +245,11 @@ class Parser:
                 variant_order=line_match[7],
             )
 
-        raise EOFError("End of section TR not reached before EOF!")
-
     def parse_lw(self) -> Iterator[ZTMVariantStop]:
         """
         Skips to next LW section and parses data from there.
         Yields ZTMVariantStop objects
         """
-        # Create a set of possible regexps
-        line_regexp = re.compile(r".*(\d{6})\s+[^,]{1,30}[\s,]+([\w-]{2})\s+\d\d\s+(NŻ|)\s*\|.*")
-        zone_regexp = re.compile(r"=+\s+([\w\s]+)\s+=+")
-
         # Skip to wanted section
         self.skip_to_section("LW")
 
@@ -261,31 +261,20 @@ class Parser:
             line = line.strip()
 
             # section end
-            if "#LW" in line:
+            if line.startswith("#LW"):
                 return
 
-            # regex for LW
-            line_match = line_regexp.match(line)
-            zone_match = zone_regexp.match(line) if line_match is None else None
-
-            # change current zone
-            if zone_match:
-                zone_txt = zone_match[1].upper()
-                if zone_txt == "PRZYSTANEK GRANICZNY":
-                    zone = "1/2"
-
-                elif zone_txt == "S T R E F A   1":
-                    zone = "1"
-
-                elif zone_txt == "S T R E F A   2":
-                    zone = "2"
+            # zone headers are the only lines starting with "="
+            if line.startswith("="):
+                if (zone_match := _LW_ZONE.match(line)):
+                    zone_txt = zone_match[1].upper()
+                    if (new_zone := _LW_ZONES.get(zone_txt)) is None:
+                        raise ValueError(f"Unrecognized zone description inside LW: {zone_txt!r}")
+                    zone = new_zone
 
-                else:
-                    raise ValueError(f"Unrecognized zone description inside LW: {zone_txt!r}")
-
-            elif line_match:
+            elif (line_match := _LW_LINE.search(line)):
                 stop_data = ZTMVariantStop(
-                    id=line_match[1],
+                    id=intern(line_match[1]),
                     on_demand=(line_match[3] == "NŻ"),
                     zone=zone,
                 )
@@ -313,22 +302,27 @@ class Parser:
         accessible_departures: Dict[str, bool] = {}
 
         while (line := self.r.readline()):
-            line = line.strip()
+            # split() already drops surrounding whitespace, no need for strip()
+            line_split = line.split()
 
-            # section marks
-            if line.startswith("#WG"):
-                inside_wg = False
+            if not line_split:
                 continue
 
-            elif line.startswith("*OD"):
-                inside_od = True
-                continue
+            # section marks - only checked on lines which can start a mark,
+            # as the vast majority of lines are departures
+            if line_split[0][:1] in ("#", "*"):
+                mark = line_split[0][:3]
 
-            elif line.startswith("#OD"):
-                return
+                if mark == "#WG":
+                    inside_wg = False
+                    continue
 
-            # line_split for parsing data
-            line_split = line.split()
+                elif mark == "*OD":
+                    inside_od = True
+                    continue
+
+                elif mark == "#OD":
+                    return
 
             # parse WG contents
             if inside_wg:
@@ -360,7 +354,7 @@ class Parser:
                 trip_id = route_id + "/" + line_split[1]
 
                 # ignore departures not found inside OD
-                if time not in accessible_departures:
+                if (accessible := accessible_departures.get(time)) is None:
                     self.logger.warn(f"Departure in OD ({time}, {trip_id}) "
                                      "unmatched with anything in WG")
                     continue
@@ -369,7 +363,7 @@ class Parser:
                 yield ZTMDeparture(
                     trip_id=trip_id,
                     time=time,
-                    accessible=accessible_departures[time],
+                    accessible=accessible,
                 )
 
         raise EOFError("End of section WG/OD not reached before EOF!")
@@ -388,26 +382,28 @@ class Parser:
         Skips to next LL section and parse it.
         Yields ZTMRoute objects.
         """
-        # Python's regex is the same as re2
-        regexp = re.compile(r"Linia:\s+([A-Za-z0-9-]{1,3})  - (.+)")
-        self.skip_to_section("LL")
+        for line_match in self._section_matches("LL", _LL_LINE):
+            yield ZTMRoute(id=line_match[1], desc=line_match[2])
+
+    def _section_matches(self, section_code: str, pattern: Pattern[str]) -> Iterator[Match[str]]:
+        """
+        Skips to the provided section and yields matches of pattern
+        against its lines; lines not matching the pattern are skipped.
+        """
+        self.skip_to_section(section_code)
+        end = "#" + section_code
 
         while (line := self.r.readline()):
             line = line.strip()
 
             # section end
-            if "#LL" in line:
+            if line.startswith(end):
                 return
 
-            # regex for TR
-            line_match = regexp.match(line)
-
-            if not line_match:
-                continue
-
-            yield ZTMRoute(id=line_match[1], desc=line_match[2])
+            if (line_match := pattern.match(line)):
+                yield line_match
 
-        raise EOFError("End of section LL not reached before EOF!")
+        raise EOFError(f"End of section {section_code} not reached before EOF!")
 
     def skip_to_section(self, section_code: str, end: bool = False):
         """
@@ -418,9 +414,8 @@ class Parser:
         search_for = join_char + section_code
 
         while (line := self.r.readline()):
-            line = line.strip()
-
-            if line.startswith(search_for):
+            # Only strip lines which could contain the marker
+            if search_for in line and line.lstrip().startswith(search_for):
                 return
 
         raise EOFError(f"{search_for} not found before EOF")
@@ -435,7 +430,11 @@ class Parser:
         section = "*" + section
 
         while (line := self.r.readline()):
-            line = line.strip()
+            # Only strip lines which could contain any of the markers
+            if finish not in line and section not in line:
+                continue
+
+            line = line.lstrip()
 
             if line.startswith(finish):
                 return False
@@ -1,7 +1,9 @@
 import csv
 import io
 import json
+import math
 import os
+from itertools import accumulate, islice
 from logging import getLogger
 from typing import (IO, Any, Dict, List, Literal, Mapping, Optional, Sequence,
                     Tuple)
@@ -10,20 +12,27 @@ import requests
 from pyroutelib3 import Router, distHaversine
 
 from ..const import DIR_SHAPE_ERR, HEADERS
-from ..util import CsvWriter, ensure_dir_exists
+from ..util import CsvWriter, ensure_dir_exists, http_session
 from .const import (BUS_ROUTER_SETTINGS, GIST_FORCE_VIA, GIST_OVERRIDE_RATIOS,
                     OVERPASS_BUS_GRAPH, OVERPASS_STOPS_JSON, URL_OVERPASS,
                     URL_TRAM_TRAIN_GRAPH)
-from .helpers import (_Pt, cache_retr, cache_save, simplify_line, time_limit,
-                      total_length)
+from .helpers import (_Pt, cache_retr, cache_retr_etag, cache_save,
+                      cache_save_etag, simplify_line, time_limit, total_length)
 from .kdtree import KDTree
 
 # cSpell: words kdtree retr rnodes
 
+# Transport types (as used by Shaper) for all accepted transport names and GTFS route_types
+_TRANSPORTS: Dict[str, Literal["bus", "tram", "train"]] = {
+    "bus": "bus", "3": "bus",
+    "tram": "tram", "0": "tram",
+    "train": "train", "2": "train",
+}
+
 
 def get_force_via() -> Dict[Tuple[str, str], Tuple[float, float]]:
     """Gets via points for some shapes between given stops"""
-    with requests.get(GIST_FORCE_VIA) as req:
+    with http_session().get(GIST_FORCE_VIA) as req:
         req.raise_for_status()
         return {
             (i["from"], i["to"]): tuple(i["via"])
@@ -33,7 +42,7 @@ def get_force_via() -> Dict[Tuple[str, str], Tuple[float, float]]:
 
 def get_override_ratios() -> Dict[Tuple[str, str], float]:
     """Gets via points for some shapes between given stops"""
-    with requests.get(GIST_OVERRIDE_RATIOS) as req:
+    with http_session().get(GIST_OVERRIDE_RATIOS) as req:
         req.raise_for_status()
         return {
             (i["from"], i["to"]): i["ratio"]
@@ -54,19 +63,31 @@ class Shaper:
         self.bus_router = self._make_router("bus")
         self.tram_router = self._make_router("tram")
         self.train_router = self._make_router("train")
+        self.routers: Dict[str, Router] = {
+            "bus": self.bus_router, "tram": self.tram_router, "train": self.train_router,
+        }
 
         # Make KD-trees for nn lookups
         self.bus_kdtree = self._make_kdtree("bus")
         self.tram_kdtree = self._make_kdtree("tram")
         self.train_kdtree = self._make_kdtree("train")
+        self.kdtrees: Dict[str, KDTree] = {
+            "bus": self.bus_kdtree, "tram": self.tram_kdtree, "train": self.train_kdtree,
+        }
 
         # Make stop_id → osm node lookup table
         self.bus_cached_stop_lookup: Dict[str, int] = {}
         self.tram_cached_stop_lookup: Dict[str, int] = {}
         self.train_cached_stop_lookup: Dict[str, int] = {}
+        self.cached_stop_lookups: Dict[str, Dict[str, int]] = {
+            "bus": self.bus_cached_stop_lookup,
+            "tram": self.tram_cached_stop_lookup,
+            "train": self.train_cached_stop_lookup,
+        }
 
         # Other used variables
         self.written_shapes: Dict[str, Mapping[int, float]] = {}
+        self.legs: Dict[Tuple[str, str, str], List[Tuple[float, float, float]]] = {}
         self.dump_shape_issues = True
 
         # Pre-cache ZTM stop to OSM ID mapping
@@ -82,38 +103,26 @@ class Shaper:
 
     # Getters
 
+    @staticmethod
+    def _transport(transport: str) -> Literal["bus", "tram", "train"]:
+        """Returns the transport type for a transport name or a GTFS route_type"""
+        try:
+            return _TRANSPORTS[transport]
+        except KeyError:
+            raise ValueError(f"Unknown transport type for shape generation: {transport}") \
+                from None
+
     def _router(self, transport: str) -> Router:
         """Returns the Router for a specific transport type"""
-        if transport in {"bus", "3"}:
-            return self.bus_router
-        elif transport in {"tram", "0"}:
-            return self.tram_router
-        elif transport in {"train", "2"}:
-            return self.train_router
-        else:
-            raise ValueError(f"Unknown transport type for shape generation: {transport}")
+        return self.routers[self._transport(transport)]
 
     def _kdtree(self, transport: str) -> KDTree:
         """Returns the KDTree for a specific transport type"""
-        if transport in {"bus", "3"}:
-            return self.bus_kdtree
-        elif transport in {"tram", "0"}:
-            return self.tram_kdtree
-        elif transport in {"train", "2"}:
-            return self.train_kdtree
-        else:
-            raise ValueError(f"Unknown transport type for shape generation: {transport}")
+        return self.kdtrees[self._transport(transport)]
 
     def _cached_stop_lookup(self, transport: str) -> Dict[str, int]:
         """Returns the stop_id → osm_node lookup table for a specific transport type"""
-        if transport in {"bus", "3"}:
-            return self.bus_cached_stop_lookup
-        elif transport in {"tram", "0"}:
-            return self.tram_cached_stop_lookup
-        elif transport in {"train", "2"}:
-            return self.train_cached_stop_lookup
-        else:
-            raise ValueError(f"Unknown transport type for shape generation: {transport}")
+        return self.cached_stop_lookups[self._transport(transport)]
 
     # External data loading
 
@@ -132,7 +141,7 @@ class Shaper:
             buffer = io.BytesIO()
 
             # Make query to Overpass
-            with requests.get(URL_OVERPASS, params={"data": OVERPASS_BUS_GRAPH}) as resp:
+            with http_session().get(URL_OVERPASS, params={"data": OVERPASS_BUS_GRAPH}) as resp:
                 resp.raise_for_status()
                 for chunk in resp.iter_content(1024 * 16):
                     buffer.write(chunk)
@@ -144,15 +153,41 @@ class Shaper:
 
             return buffer
 
-    @staticmethod
-    def _get_tramrail_graph() -> IO[bytes]:
-        """Retrieves URL_TRAM_TRAIN_GRAPH"""
+    def _get_tramrail_graph(self) -> IO[bytes]:
+        """Retrieves URL_TRAM_TRAIN_GRAPH. The cached graph is revalidated with its ETag,
+        and only downloaded again if it has changed."""
+        cached_name = "tram_train_graph.osm"
+        etag = cache_retr_etag(cached_name)
+        headers = {"If-None-Match": etag} if etag else {}
+
+        with http_session().get(URL_TRAM_TRAIN_GRAPH, headers=headers, stream=True) as resp:
+            if resp.status_code != 304:
+                return self._download_tramrail_graph(cached_name, resp)
+
+            # Return the graph if it's cached and unchanged
+            if (cached_file := cache_retr(cached_name, math.inf)):
+                self.logger.debug("OSM Tram & Train Graph is loaded from cache")
+                return cached_file
+
+        # The cached graph has disappeared since its ETag was read - download it unconditionally
+        with http_session().get(URL_TRAM_TRAIN_GRAPH, stream=True) as resp:
+            return self._download_tramrail_graph(cached_name, resp)
+
+    def _download_tramrail_graph(self, cached_name: str, resp: requests.Response) -> IO[bytes]:
+        """Reads the OSM Tram & Train Graph from a response,
+        caching it (with its ETag) only if it's a full 200 response"""
+        self.logger.debug("OSM Tram & Train Graph is downloaded")
+        resp.raise_for_status()
         temp_buffer = io.BytesIO()
 
-        with requests.get(URL_TRAM_TRAIN_GRAPH, stream=True) as resp:
-            resp.raise_for_status()
-            for chunk in resp.iter_content(1024 * 128):
-                temp_buffer.write(chunk)
+        for chunk in resp.iter_content(1024 * 128):
+            temp_buffer.write(chunk)
+
+        # Write to cache
+        if resp.status_code == 200:
+            temp_buffer.seek(0)
+            cache_save(cached_name, temp_buffer)
+            cache_save_etag(cached_name, resp.headers.get("ETag"))
 
         temp_buffer.seek(0)
         return temp_buffer
@@ -196,12 +231,12 @@ class Shaper:
 
         if cached_file is not None:
             # Try to read osm stop mapping from a cached file
-            cached_content = cached_file.read().decode("ascii")
-            self.bus_cached_stop_lookup = json.loads(cached_content)
+            with cached_file:
+                self.bus_cached_stop_lookup.update(json.load(cached_file))
 
         else:
             # Make query to Overpass
-            with requests.get(URL_OVERPASS, params={"data": OVERPASS_STOPS_JSON}) as resp:
+            with http_session().get(URL_OVERPASS, params={"data": OVERPASS_STOPS_JSON}) as resp:
                 resp.raise_for_status()
 
                 # Iterate over every stop_position
@@ -395,19 +430,27 @@ class Shaper:
             route = straight_route
 
         # Tranform route from (lat, lon) to (lat, lon, dist_from_start)
-        route_with_dist: List[Tuple[float, float, float]] = []
-        while route:
-            point = route.pop(0)
+        dists_from_start = accumulate(
+            map(distHaversine, route, islice(route, 1, None)),
+            initial=0.0,
+        )
 
-            if not route_with_dist:
-                route_with_dist.append((*point, 0.0))
-            else:
-                prev_point = route_with_dist[-1]
-                route_with_dist.append(
-                    (*point, prev_point[2] + distHaversine(prev_point[:2], point))  # type: ignore
-                )
+        return [(lat, lon, dist) for (lat, lon), dist in zip(route, dists_from_start)]
 
-        return route_with_dist
+    def leg_between_stops(self, from_stop: str, to_stop: str, transport: str) \
+            -> List[Tuple[float, float, float]]:
+        """
+        Cached version of route_between_stops.
+        Different variants share lots of stop pairs, and each routing is expensive.
+        """
+        key = (from_stop, to_stop, transport)
+        leg = self.legs.get(key)
+
+        if leg is None:
+            leg = self.route_between_stops(from_stop, to_stop, transport)
+            self.legs[key] = leg
+
+        return leg
 
     # Generating route for a pattern
 
@@ -429,33 +472,33 @@ class Shaper:
         distances = {0: 0.0}
 
         legs = (
-            self.route_between_stops(stops[i-1], stops[i], route_type)
+            self.leg_between_stops(stops[i-1], stops[i], route_type)
             for i in range(1, len(stops))
         )
 
+        rows = []
+
         for stop_sequence, leg in enumerate(legs, 1):
             # The very first point of a leg is always the same as previous leg's last point,
             # So it's normally omitted. However, for the very first leg, there's no
             # »previous leg«
             if stop_sequence == 1:
                 point_sequence += 1
-                self.writer.writerow([
-                    shape_id, point_sequence, "0.0", leg[0][0], leg[0][1]
-                ])
+                rows.append([shape_id, point_sequence, "0.0", leg[0][0], leg[0][1]])
 
             # Iterate over points of given leg
             for point in leg[1:]:
                 point_sequence += 1
                 point_dist = total_dist + point[2]
-
-                self.writer.writerow([
-                    shape_id, point_sequence, f"{point_dist:.4f}", point[0], point[1]
-                ])
+                rows.append([shape_id, point_sequence, f"{point_dist:.4f}", point[0], point[1]])
 
             # Save this leg distance
             total_dist += leg[-1][2]
             distances[stop_sequence] = total_dist
 
+        # Write all points of the shape at once
+        self.writer.writerows(rows)
+
         # Save distances
         self.written_shapes[shape_id] = distances
         return shape_id, distances
@@ -464,8 +507,9 @@ class Shaper:
 
     def open(self, target_dir: str, clear_shape_errs: bool = True) -> None:
         """Opens required files."""
-        # Clear already-written shapes
+        # Clear already-written shapes and routed legs
         self.written_shapes = {}
+        self.legs = {}
 
         # Create file object
         file_path = os.path.join(target_dir, "shapes.txt")
@@ -1,7 +1,10 @@
 import math
 import os
+import shutil
 import signal
+import threading
 from contextlib import contextmanager
+from itertools import compress, islice
 from time import time
 from typing import IO, Generator, List, Optional, Tuple, Union
 
@@ -15,12 +18,24 @@ from ..util import ensure_dir_exists
 _Pt = Tuple[float, float]
 
 
+def _raise_timeout(signum, frame):
+    raise TimeoutError
+
+
 @contextmanager
-def time_limit(sec) -> Generator[None, None, None]:
-    "Time limter based on https://gist.github.com/Rabbit52/7449101"
-    def handler(x, y):
-        raise TimeoutError
-    signal.signal(signal.SIGALRM, handler)
+def time_limit(sec: int) -> Generator[None, None, None]:
+    """Time limter based on https://gist.github.com/Rabbit52/7449101.
+    Signals can only be used from the main thread, and SIGALRM is not available everywhere;
+    in such cases the body runs without any time limit.
+    """
+    if not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    # Only install the handler once, instead of on every call
+    if signal.getsignal(signal.SIGALRM) is not _raise_timeout:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
     signal.alarm(sec)
     try:
         yield
@@ -29,26 +44,38 @@ def time_limit(sec) -> Generator[None, None, None]:
 
 
 def total_length(x: List[_Pt]) -> float:
-    dist = 0.0
-    for i in range(1, len(x)):
-        dist += distHaversine(x[i-1], x[i])
-    return dist
+    """Calculates the length of a polyline, in kilometers"""
+    return sum(map(distHaversine, x, islice(x, 1, None)))
 
 
-def dist_point_to_line(r: _Pt, p1: _Pt, p2: _Pt) -> float:
-    """Defines distance from point r to line defined by point p1 and p2."""
+def furthest_from_line(x: List[_Pt], start: int, end: int) -> Tuple[int, float]:
+    """Finds the point from x[start+1:end] furthest away from line defined by x[start] and x[end].
+    Returns its index and the distance; or (-1, 0.0) if no point lies outside of the line.
+    """
     # See https://en.wikipedia.org/wiki/Distance_from_a_point_to_a_line,
-    # algorithm "Line defined by two points"
-    # Unpack coordinates
-    x0, y0 = r
-    x1, y1 = p1
-    x2, y2 = p2
-
-    # DIfferences between p1, p2 coordinates
+    # algorithm "Line defined by two points".
+    # Everything not depending on the checked point is only calculated once.
+    x1, y1 = x[start]
+    x2, y2 = x[end]
     dx = x2 - x1
     dy = y2 - y1
+    c = x2*y1 - y2*x1
+
+    # Compare only the numerators of the distance, as the denominator is constant
+    furthest_idx = -1
+    furthest_num = 0.0
+
+    for idx in range(start + 1, end):
+        x0, y0 = x[idx]
+        num = abs(dy*x0 - dx*y0 + c)
+        if num > furthest_num:
+            furthest_num = num
+            furthest_idx = idx
+
+    if furthest_idx < 0:
+        return -1, 0.0
 
-    return abs(dy*x0 - dx*y0 + x2*y1 - y2*x1) / math.sqrt(dy**2 + dx**2)
+    return furthest_idx, furthest_num / math.sqrt(dy*dy + dx*dx)
 
 
 def simplify_line(x: List[_Pt], threshold: float) -> List[_Pt]:
@@ -57,31 +84,29 @@ def simplify_line(x: List[_Pt], threshold: float) -> List[_Pt]:
     if len(x) <= 2:
         return x
 
-    # Find point furthest away from line (x[0], x[-1])
-    furthest_pt_dist = 0
-    furthest_pt_index = -1
+    # Instead of recursing on slices of x, keep a stack of (start, end) ranges
+    # still to be simplified, and mark which points are kept.
+    keep = [False] * len(x)
+    keep[0] = keep[-1] = True
+    to_check = [(0, len(x) - 1)]
 
-    for pt_idx, pt in enumerate(x[1:-1], start=1):
-        pt_dist = dist_point_to_line(pt, x[0], x[-1])
-        if pt_dist > furthest_pt_dist:
-            furthest_pt_dist = pt_dist
-            furthest_pt_index = pt_idx
+    while to_check:
+        start, end = to_check.pop()
 
-    # If furthest point is further then given threshold, simplify recursively both parts
-    if furthest_pt_dist > threshold:
-        left_simplified = simplify_line(x[:furthest_pt_index + 1], threshold)
-        right_simplified = simplify_line(x[furthest_pt_index:], threshold)
+        # Find point furthest away from line (x[start], x[end])
+        furthest_pt_index, furthest_pt_dist = furthest_from_line(x, start, end)
 
-        # strip last point from `left_simplified` to avoid furthest point being included twice
-        return left_simplified[:-1] + right_simplified
+        # If furthest point is further then given threshold, simplify both parts.
+        # Otherwise the simplification is just the segment (x[start], x[end]).
+        if furthest_pt_dist > threshold:
+            keep[furthest_pt_index] = True
+            to_check.append((furthest_pt_index, end))
+            to_check.append((start, furthest_pt_index))
 
-    # If furthest point is close then given threshold, the simplification is just the
-    # segment from start & end of x.
-    else:
-        return [x[0], x[-1]]
+    return list(compress(x, keep))
 
 
-def cache_retr(file: str, ttl_minutes: int = SHAPE_CACHE_TTL) -> Optional[IO[bytes]]:
+def cache_retr(file: str, ttl_minutes: float = SHAPE_CACHE_TTL) -> Optional[IO[bytes]]:
     """
     Tries to read specified from cache.
     If file is older then specified time-to-live,
@@ -113,5 +138,30 @@ def cache_save(file: str, reader: Union[IO[bytes], bytes]) -> None:
         if isinstance(reader, bytes):
             writer.write(reader)
         else:
-            while (chunk := reader.read(1024 * 16)):
-                writer.write(chunk)
+            shutil.copyfileobj(reader, writer, 1024 * 128)
+
+
+def cache_retr_etag(file: str) -> Optional[str]:
+    """Returns the ETag saved alongside a cached file,
+    or None if the file or its ETag is not cached."""
+    file_path = os.path.join(DIR_SHAPE_CACHE, file)
+    etag_path = file_path + ".etag"
+
+    if not (os.path.exists(file_path) and os.path.exists(etag_path)):
+        return
+
+    with open(etag_path, "r", encoding="ascii") as f:
+        return f.read().strip() or None
+
+
+def cache_save_etag(file: str, etag: Optional[str]) -> None:
+    """Saves the ETag of a cached file. If etag is None, removes any previously saved ETag."""
+    ensure_dir_exists(DIR_SHAPE_CACHE, clear=False)
+    etag_path = os.path.join(DIR_SHAPE_CACHE, file) + ".etag"
+
+    if etag is None:
+        if os.path.exists(etag_path):
+            os.remove(etag_path)
+    else:
+        with open(etag_path, "w", encoding="ascii") as f:
+            f.write(etag)
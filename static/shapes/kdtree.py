@@ -23,9 +23,13 @@ def _brute_nn(root: _Pt, space: Iterable[Point]) -> Point:
     """
     best = None
     best_dist = float("inf")
+    root_lat, root_lon = root
 
+    # _dist_squared is inlined, as this loop runs for every point in a leaf
     for pt in space:
-        dist = _dist_squared(root, pt)
+        d_lat = pt[0] - root_lat
+        d_lon = pt[1] - root_lon
+        dist = d_lat*d_lat + d_lon*d_lon
         if dist < best_dist:
             best = pt
             best_dist = dist
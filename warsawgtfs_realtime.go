@@ -23,8 +23,17 @@ import (
    & CLI FLAGS
   ================ */
 
-// Default http client
-var client *http.Client = http.DefaultClient
+// Default http client, shared by all requests
+var client *http.Client = newHTTPClient()
+
+// newHTTPClient creates a http.Client which keeps enough idle connections
+// to reuse them across concurrent requests to the same host
+// (http.DefaultTransport keeps only 2 per host)
+func newHTTPClient() *http.Client {
+	transport := http.DefaultTransport.(*http.Transport).Clone()
+	transport.MaxIdleConnsPerHost = 16
+	return &http.Client{Transport: transport}
+}
 
 // Default CLI flags
 var (